@@ -0,0 +1,50 @@
+"""Throughput of the Arrow and pandas conversions of a RangeArray.
+
+    python -m benchmarks.interop [rows]
+"""
+import sys
+import time
+
+import numpy
+
+from timestring import interop
+from timestring.RangeArray import RangeArray
+from timestring.vectorized import INFINITY_US, NEG_INFINITY_US
+
+
+def ranges(count, tz='US/Eastern'):
+    # hour long ranges over 2014, one in a thousand open ended each way
+    starts = numpy.random.RandomState(0).randint(1388534400000000, 1420070400000000, count).astype('int64')
+    ends = starts + 3600000000
+    ends[::1000] = INFINITY_US
+    starts[500::1000] = NEG_INFINITY_US
+    return RangeArray(starts, ends, tz=tz)
+
+
+def measure(convert, value, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        result = convert(value)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(count=10000000):
+    array = ranges(count)
+    print("%-22s %10s %14s" % ('conversion', 'seconds', 'rows/second'))
+    cases = (
+        ('to_arrow', interop.to_arrow, array),
+        ('from_arrow', interop.from_arrow, None),
+        ('to_interval_index', interop.to_interval_index, array),
+        ('from_interval_index', interop.from_interval_index, None),
+    )
+    previous = None
+    for name, convert, value in cases:
+        elapsed, previous = measure(convert, previous if value is None else value)
+        print("%-22s %10.3f %14.0f" % (name, elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
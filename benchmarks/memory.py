@@ -0,0 +1,50 @@
+"""Memory footprint of Date/Range against their compact forms.
+
+    python -m benchmarks.memory [count]
+"""
+import sys
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from timestring import Date, Range
+from timestring.compact import CompactDate, CompactRange
+
+
+def measure(build, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(objects) == count
+    return float(after - before) / count
+
+
+def starts(count):
+    base = datetime(2014, 1, 1)
+    return [base + timedelta(minutes=i) for i in range(count)]
+
+
+def ranges(count):
+    return [Range(start, start + timedelta(hours=1)) for start in starts(count)]
+
+
+def main(count=100000):
+    # temporaries are released before measuring, so only what is kept counts
+    cases = (
+        ('Date', lambda n: [Date(start) for start in starts(n)]),
+        ('CompactDate', lambda n: [CompactDate.from_date(Date(start)) for start in starts(n)]),
+        ('CompactDate(epoch)', lambda n: [CompactDate.from_date(Date(start), epoch=True) for start in starts(n)]),
+        ('Range', ranges),
+        ('CompactRange', lambda n: [CompactRange.from_range(r) for r in ranges(n)]),
+        ('CompactRange(epoch)', lambda n: [CompactRange.from_range(r, epoch=True) for r in ranges(n)]),
+    )
+    print("%-22s %12s" % ('representation', 'bytes/item'))
+    for name, build in cases:
+        print("%-22s %12.1f" % (name, measure(build, count)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,89 @@
+"""Runs the benchmark suite, stores the results as JSON and checks them against a baseline.
+
+    python -m benchmarks.run                                  # print timings
+    python -m benchmarks.run -o results.json                  # and save them
+    python -m benchmarks.run -b baseline.json -t 0.25         # fail on > 25% regressions
+    python -m benchmarks.run -k 'date\\.' -o baseline.json     # only matching benchmarks
+
+Exits with 1 when any benchmark is slower than the baseline by more than the threshold.
+"""
+import re
+import sys
+import json
+import timeit
+import platform
+import argparse
+from datetime import datetime
+
+
+def measure(bench, repeat=5, min_time=0.2):
+    """Returns the best seconds per operation of `bench` over `repeat` runs"""
+    timer = timeit.Timer(bench)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed * 10 > min_time else 10
+    best = min([elapsed] + timer.repeat(repeat - 1, number))
+    return best / number / getattr(bench, 'size', 1)
+
+
+def compare(results, baseline, threshold):
+    """Returns (name, baseline, result, change) for every benchmark that regressed beyond `threshold`"""
+    regressions = []
+    for name, result in sorted(results['benchmarks'].items()):
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            continue
+        change = result['seconds'] / before['seconds'] - 1
+        if change > threshold:
+            regressions.append((name, before['seconds'], result['seconds'], change))
+    return regressions
+
+
+def run(benchmarks, pattern=None, repeat=5, min_time=0.2, out=sys.stdout):
+    results = dict(meta=dict(python=platform.python_version(),
+                             implementation=platform.python_implementation(),
+                             created=datetime.now().isoformat()),
+                   benchmarks={})
+    for name in sorted(benchmarks):
+        if pattern and not re.search(pattern, name):
+            continue
+        seconds = measure(benchmarks[name], repeat, min_time)
+        results['benchmarks'][name] = dict(seconds=seconds)
+        out.write("%-32s %12.2f us/op\n" % (name, seconds * 1e6))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmarks.run')
+    parser.add_argument('-k', '--filter', help="Only run benchmarks whose name matches this regex")
+    parser.add_argument('-o', '--output', help="Write the results as JSON to this file")
+    parser.add_argument('-b', '--baseline', help="Compare against the results in this JSON file")
+    parser.add_argument('-t', '--threshold', type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, 0.25 is 25%%")
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds each timing should last at least")
+    args = parser.parse_args(argv)
+
+    from benchmarks.suite import BENCHMARKS
+    results = run(BENCHMARKS, args.filter, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, change in regressions:
+            sys.stdout.write("REGRESSION %-32s %10.2f -> %10.2f us/op (+%.0f%%)\n" % (name, before * 1e6, after * 1e6, change * 100))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""Benchmarks for every public parse and comparison path.
+
+Each benchmark is a callable running one pass over its corpus, `run.py`
+times them and divides by the corpus size to report seconds per operation.
+Relative phrases all resolve against the fixed NOW so runs are comparable.
+"""
+from datetime import datetime
+
+from timestring import Date, Range, Delta, findall, parse, get_backend, set_backend, get_engine, set_engine
+from timestring import timestring_re
+
+
+NOW = datetime(2014, 3, 6, 12, 30, 0)
+
+DATES = {
+    'relative': ['3 weeks ago', '10 days', 'sixty days ago', 'couple of months ago', '2 years ago'],
+    'named_day': ['yesterday', 'tomorrow', 'last tuesday', 'next friday', 'sunday'],
+    'month_name': ['august 15th 2014', "dec 15th '01", 'may 23rd, 1988 at 6:24 am', 'jan 5th', 'feb 2011'],
+    'numeric': ['05/23/2012', '1-2-13', '2012/12/11', '05/2012', '2012'],
+    'time_of_day': ['7:30 pm', '6:35', '7am', 'noon', 'tomorrow at 10:15:30'],
+    'unixtime': ['1374681560', '1394109000', '1000000000', '1234567890', '1400000000'],
+    'pg': ['2014-03-06 15:33:43.764419-05', '2013-12-09 06:57:46.54502-05', '2014-01-01 00:00:00.0-00',
+           '2012-02-29 23:59:59.999999-08', '2010-06-15 12:00:00.5-03'],
+    'iso': ['2013-09-10', '2013-09-10T10:45:50', '2013-09-10 10:45', '1999-12-31T23:59:59', '2012-02-29'],
+}
+
+RANGES = {
+    'this': ['this year', 'this month', 'this week', 'this day', 'this hour'],
+    'next': ['next week', 'next 10 weeks', 'next 5 days', 'next year', 'next 3 months'],
+    'last': ['last year', 'last 7 days', 'last 6 months', 'last 2 weeks', 'last 12 hours'],
+    'ago': ['1 year ago', '3 weeks ago', '5 days ago', 'year ago', '2 months ago'],
+    'between': ['between january 15th at 3 am and august 5th 5pm', 'From 04/17/13 04:18:00 to 05/01/13 17:01:00',
+                '2012 feb 2 1:13PM to 6:41 am on sept 8 2012', 'tomorrow 10am to 5pm', 'from jan 10th 2010 to feb 2nd 2010'],
+}
+
+PROSE = (
+    "Once upon a time, about 3 weeks ago, there was a boy whom was born on august 15th at 7:20 am. "
+    "He said he would call back next week, or maybe on tuesday at 10pm, but the ticket from 05/23/2012 "
+    "was only closed between january 15th at 3 am and august 5th 5pm after 2 reminders. "
+    "The outage started 2013-09-10T10:45:50 and lasted until noon the following day. "
+) * 40
+
+TZ = ['US/Eastern', 'Europe/Berlin', 'Asia/Tokyo', 'Australia/Sydney', 'UTC']
+
+# inputs TIMESTRING_RE backtracks on: digits splitting into numbers every
+# possible way, and runs retried from every position
+PATHOLOGICAL = {
+    'digits': '12345678 12345678 !',
+    'numbers': '1 ' * 200 + '!',
+    'spaces': ' ' * 400 + '!',
+}
+
+PARSE = ['tuesday at 10pm', 'may of 2014', 'august 25th, 2014 12:30 PM', '1-2-13 2 am', 'tomorrow at noon']
+
+
+def _parse_dates(corpus):
+    def bench():
+        for text in corpus:
+            Date(text, now=NOW)
+    bench.size = len(corpus)
+    return bench
+
+
+def _parse_ranges(corpus):
+    def bench():
+        for text in corpus:
+            Range(text, now=NOW)
+    bench.size = len(corpus)
+    return bench
+
+
+def _pairs(build, func):
+    items = build()
+
+    def bench():
+        for a, b in items:
+            func(a, b)
+    bench.size = len(items)
+    return bench
+
+
+def _dates():
+    return [Date(text, now=NOW) for texts in DATES.values() for text in texts]
+
+
+def _ranges():
+    return [Range(text, now=NOW) for texts in RANGES.values() for text in texts]
+
+
+def _date_pairs():
+    dates = _dates()
+    return list(zip(dates, dates[1:] + dates[:1]))
+
+
+def _range_pairs():
+    ranges = _ranges()
+    return list(zip(ranges, ranges[1:] + ranges[:1]))
+
+
+def _date_range_pairs():
+    return list(zip(_dates(), _ranges()))
+
+
+def _findall():
+    findall(PROSE, now=NOW)
+_findall.size = 1
+
+
+def _parse():
+    for text in PARSE:
+        parse(text, now=NOW)
+_parse.size = len(PARSE)
+
+
+def _sort():
+    ranges = _ranges() * 20
+
+    def bench():
+        sorted(ranges)
+    bench.size = len(ranges)
+    return bench
+
+
+def _iter(step):
+    span = Range(datetime(2011, 1, 1), datetime(2014, 1, 1))
+    size = len(list(span.iter(step)))
+
+    def bench():
+        for _ in span.iter(step):
+            pass
+    bench.size = size
+    return bench
+
+
+def _tz(text, backend):
+    zones = TZ * 20
+
+    def bench():
+        # switching drops the resolved zones, so only switch once per pass
+        previous = get_backend()
+        if previous != backend:
+            set_backend(backend)
+        try:
+            for tz in zones:
+                Date(text, tz=tz, now=NOW)
+        finally:
+            if previous != backend:
+                set_backend(previous)
+    bench.size = len(zones)
+    return bench
+
+
+def _copy(format):
+    from timestring.postgres import copy_rows
+    rows = [(_range, ) for _range in _ranges() * 20]
+
+    def bench():
+        for _ in copy_rows(rows, format):
+            pass
+    bench.size = len(rows)
+    return bench
+
+
+def _mogrify():
+    # psycopg2 adapts values without a connection, which is what mogrify does per row
+    from psycopg2.extensions import adapt
+    rows = _ranges() * 20
+
+    def bench():
+        for _range in rows:
+            adapt(_range).getquoted()
+    bench.size = len(rows)
+    return bench
+
+
+RANGE_LITERALS = ['["2014-03-%02d 15:33:43.764419-05","2014-03-%02d 00:00:00.0-05")' % (day, day + 1)
+                  for day in range(1, 21)]
+
+
+def _decode(func):
+    def bench():
+        func(RANGE_LITERALS)
+    bench.size = len(RANGE_LITERALS)
+    return bench
+
+
+def _engine(engine, func, size=1):
+    def bench():
+        previous = get_engine()
+        if previous != engine:
+            set_engine(engine)
+        try:
+            func()
+        finally:
+            if previous != engine:
+                set_engine(previous)
+    bench.size = size
+    return bench
+
+
+def _search(text):
+    return lambda: timestring_re.PATTERN.search(text)
+
+
+def _elapse():
+    ranges = [r for r in _ranges() if r.end != 'infinity']
+
+    def bench():
+        for r in ranges:
+            r.elapse
+    bench.size = len(ranges)
+    return bench
+
+
+def _buckets(step):
+    span = Range(datetime(2013, 12, 6), datetime(2014, 3, 6))
+    buckets = span.buckets(step)
+    points = [datetime(2013, 12, 1) + (NOW - datetime(2013, 12, 1)) * index / 10000 for index in range(10000)]
+
+    def bench():
+        buckets.histogram(points)
+    bench.size = len(points)
+    return bench
+
+
+BENCHMARKS = dict(
+    [('date.%s' % branch, _parse_dates(corpus)) for branch, corpus in DATES.items()] +
+    [('range.%s' % ref, _parse_ranges(corpus)) for ref, corpus in RANGES.items()] +
+    [
+        ('findall.prose', _findall),
+        ('findall.prose.tokens', _engine('tokens', _findall)),
+        ('parse', _parse),
+        ('compare.date_lt', _pairs(_date_pairs, lambda a, b: a < b)),
+        ('compare.date_eq', _pairs(_date_pairs, lambda a, b: a == b)),
+        ('compare.range_cmp', _pairs(_range_pairs, lambda a, b: a.cmp(b))),
+        ('compare.range_lt', _pairs(_range_pairs, lambda a, b: a < b)),
+        ('compare.range_sort', _sort()),
+        ('contains.date_in_range', _pairs(_date_range_pairs, lambda d, r: d in r)),
+        ('contains.range_in_range', _pairs(_range_pairs, lambda a, b: a in b)),
+        ('adjust.date_adjust', _pairs(lambda: [(d, '1 day') for d in _dates()], lambda d, delta: d.adjust(delta))),
+        ('adjust.date_add', _pairs(lambda: [(d, '3 hours') for d in _dates()], lambda d, delta: d + delta)),
+        ('adjust.date_sub', _pairs(lambda: [(d, '2 weeks') for d in _dates()], lambda d, delta: d - delta)),
+        ('adjust.date_add_delta', _pairs(lambda: [(d, Delta(hours=3)) for d in _dates()], lambda d, delta: d + delta)),
+        ('adjust.range_add', _pairs(lambda: [(r, '1 day') for r in _ranges()], lambda r, delta: r + delta)),
+        ('elapse', _elapse()),
+        ('postgres.copy_text', _copy('text')),
+        ('postgres.decode_ranges', _decode(lambda texts: __import__('timestring.postgres').postgres.decode_ranges(texts))),
+        ('postgres.range_literal', _decode(lambda texts: [Range(text) for text in texts])),
+        ('postgres.copy_binary', _copy('binary')),
+        ('tz.pytz.iso', _tz('2014-03-06 15:30', 'pytz')),
+        ('tz.pytz.today', _tz('today', 'pytz')),
+        ('tz.zoneinfo.iso', _tz('2014-03-06 15:30', 'zoneinfo')),
+        ('tz.zoneinfo.today', _tz('today', 'zoneinfo')),
+        ('iter.days', _iter('1 day')),
+        ('iter.months', _iter('1 month')),
+        ('buckets.hours', _buckets('1 hour')),
+        ('buckets.months', _buckets('1 month')),
+        ('next', _pairs(lambda: [(r, 3) for r in _ranges() if r.start != 'infinity' and r.end != 'infinity'],
+                        lambda r, times: r.next(times))),
+    ] +
+    [('pathological.%s.%s' % (kind, engine), _engine(engine, _search(text)))
+     for kind, text in PATHOLOGICAL.items() for engine in ('regex', 'tokens')]
+)
+
+try:
+    BENCHMARKS['postgres.mogrify'] = _mogrify()
+except ImportError:
+    pass
@@ -27,4 +27,5 @@ setup(name='timestring',
       include_package_data=True,
       zip_safe=True,
       install_requires=["pytz>=2013b"],
+      extras_require={'numpy': ["numpy"]},
       entry_points={'console_scripts': ['timestring=timestring:main']})
@@ -1,13 +1,32 @@
+import io
 import os
+import sys
+import json
 import time
+import random
 import unittest
 from ddt import ddt, data
 from six import u
 from datetime import datetime, timedelta
 
 from timestring import Date
+from timestring import TimestringInvalid
 from timestring import Range
 from timestring import parse
+from timestring import RangeIndex
+from timestring import RangeSet
+from timestring import RangeArray
+from timestring import findall, finditer
+from timestring import cache
+from timestring import parse_many, parse_range_many
+from timestring.Date import epoch_us
+from timestring import cli
+from timestring.compact import CompactDate, CompactRange
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 from timestring.text2num import text2num
 
 
@@ -398,6 +417,816 @@ class timestringTests(unittest.TestCase):
         date2 = date1 + "10 seconds"
         self.assertEqual(date1.second + 10, date2.second)
 
+    def test_cache(self):
+        cache.enable_cache()
+        try:
+            first, second = Date('today'), Date('today')
+            self.assertEqual(first, second)
+            self.assertFalse(first is second)
+            self.assertEqual(cache.cache_info().hits, 1)
+            self.assertEqual(Range('last 7 days'), Range('last 7 days'))
+            self.assertEqual(len(Range('last 7 days')), 604800)
+            size = cache.cache_info().currsize
+            Date('now')
+            self.assertEqual(cache.cache_info().currsize, size)
+        finally:
+            cache.disable_cache()
+
+        c = cache.ParseCache(maxsize=2)
+        c.put('a', 1)
+        c.put('b', 2)
+        self.assertEqual(c.get('a'), 1)
+        c.put('c', 3)
+        self.assertTrue(c.get('b') is cache.MISS)
+        self.assertEqual(c.info().evictions, 1)
+
+        # stale entries are dropped when the day rolls over
+        c.put('key', 'value', stamp=datetime(2014, 1, 1))
+        self.assertEqual(c.get('key', stamp=datetime(2014, 1, 1)), 'value')
+        self.assertTrue(c.get('key', stamp=datetime(2014, 1, 2)) is cache.MISS)
+        self.assertEqual(c.info().expirations, 1)
+
+        self.assertEqual(cache.granularity('last 7 days'), 'day')
+        self.assertEqual(cache.granularity('this hour'), 'hour')
+        self.assertEqual(cache.granularity('today at this time'), 'minute')
+        self.assertEqual(cache.granularity('this minute'), False)
+        self.assertEqual(cache.granularity('1374681560'), None)
+
+    def test_dispatch(self):
+        date = Date('2013-09-10T10:45:50')
+        self.assertEqual(date.tier, 'iso')
+        self.assertEqual(date.date, datetime(2013, 9, 10, 10, 45, 50))
+        self.assertEqual(Date('2013-09-10', offset=dict(hour=6)).hour, 6)
+        self.assertEqual(Date('2013-09-10 10:45', offset=dict(hour=6)).hour, 10)
+        self.assertEqual(Date('2013-09-10', tz='US/Central').tz.zone, 'US/Central')
+        self.assertEqual(Date('1374681560').tier, 'unixtime')
+        self.assertEqual(Date('2014-03-06 15:33:43.764419-05').tier, 'pg')
+        self.assertEqual(Date('infinity').tier, 'literal')
+        self.assertEqual(Date('tomorrow').tier, 'regex')
+        self.assertEqual(Date(datetime.now()).tier, None)
+        self.assertRaises(ValueError, Date, '2013-02-30')
+
+        _range = Range('2013-09-10')
+        self.assertEqual(_range.tier, 'iso')
+        self.assertEqual(len(_range), 86400)
+        self.assertEqual(Range('last 7 days').tier, 'regex')
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_parse_many(self):
+        values, valid = parse_many(["2013-09-10", "1374681560", "2013-09-10", None, "nope", "infinity"])
+        self.assertEqual(values.dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(valid.tolist(), [True, True, True, False, False, True])
+        self.assertEqual(values[0], numpy.datetime64('2013-09-10T00:00:00'))
+        self.assertEqual(values[0], values[2])
+        self.assertEqual(values[1].astype('int64'), epoch_us(Date(1374681560).date))
+        self.assertTrue(numpy.isnat(values[3]))
+        self.assertEqual(values[5].astype('int64'), 2 ** 63 - 1)
+
+        # timestamps pass through, other non strings are invalid rather than today
+        values, valid = parse_many(numpy.array(['2014-03-05T10:00', 'NaT'], dtype='datetime64[ns]'))
+        self.assertEqual(values.dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(values[0], numpy.datetime64('2014-03-05T10:00'))
+        self.assertEqual(valid.tolist(), [True, False])
+        values, valid = parse_many([datetime(2014, 3, 5, 10), numpy.datetime64('2014-03-05T10:00', 'ns'), 20140305, 1.5, object()])
+        self.assertEqual(valid.tolist(), [True, True, False, False, False])
+        self.assertEqual(values[0], values[1])
+        self.assertTrue(numpy.isnat(values[2]))
+        starts, ends, valid = parse_range_many([20140305, datetime(2014, 3, 5)])
+        self.assertEqual(valid.tolist(), [False, False])
+
+        starts, ends, valid = parse_range_many(numpy.array(["2010", "last 7 days", "", '["2013-12-09 06:57:46.54502-05",infinity)'], dtype=object))
+        self.assertEqual(valid.tolist(), [True, True, False, True])
+        self.assertEqual(starts[0], numpy.datetime64('2010-01-01'))
+        self.assertEqual(ends[0], numpy.datetime64('2011-01-01'))
+        self.assertEqual((ends[1] - starts[1]).astype('timedelta64[s]').astype('int64'), 604800)
+        self.assertEqual(ends[3].astype('int64'), 2 ** 63 - 1)
+
+    def test_finditer(self):
+        text = "once upon a time, about 3 weeks ago, there was a boy whom was born on august 15th at 7:20 am. epic. " * 5
+        expected = [(t, str(v)) for t, v in findall(text)]
+        self.assertEqual(len(expected), 10)
+        for chunk_size in (1, 13, 4096):
+            found = list(finditer(io.StringIO(text), chunk_size=chunk_size))
+            self.assertEqual([(t, str(v)) for span, t, v in found], expected)
+            for (start, end), t, v in found:
+                self.assertEqual(text[start:end], t)
+
+        found = list(finditer(iter(["born on aug", "ust 15th at 7:", "20 am"])))
+        self.assertEqual(found[0][:2], ((8, 30), 'august 15th at 7:20 am'))
+
+    def test_cli_batch(self):
+        output = io.StringIO()
+        cli.batch(io.StringIO(u"2010\n\nnope\n2013-09-10\n"), output)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([r['input'] for r in records], ['2010', 'nope', '2013-09-10'])
+        self.assertEqual(records[0]['start'], '2010-01-01 00:00:00')
+        self.assertEqual(records[0]['end'], '2011-01-01 00:00:00')
+        self.assertTrue('error' in records[1])
+
+        output = io.StringIO()
+        source = u"id,when\n1,2013-09-10T10:45:50\n2,1374681560\n3,jan 5th 2012\n"
+        cli.batch(io.StringIO(source), output, date=True, column='when', format='csv', jobs=2, chunksize=1)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], 'input,date,epoch,error')
+        self.assertEqual([line.split(',')[1] for line in lines[1:]],
+                         ['2013-09-10 10:45:50', str(Date(1374681560)), '2012-01-05 00:00:00'])
+
+    @unittest.skipIf(sys.version_info < (3, ), "scanning needs python 3")
+    def test_scan_files(self):
+        import tempfile
+        import shutil
+        from timestring import scan_files
+        from timestring.scan import plan
+        now = datetime(2014, 3, 6, 12, 30)
+        text = u"caf\u00e9 opened on august 15th at 7:20 am, closed 3 weeks ago. " * 300
+        folder = tempfile.mkdtemp()
+        try:
+            paths = []
+            for name, content in (('big.txt', text), ('empty.txt', u''), ('small.txt', u'due 2013-09-10')):
+                paths.append(os.path.join(folder, name))
+                with io.open(paths[-1], 'w', encoding='utf-8') as f:
+                    f.write(content)
+
+            # segments balance bytes, the big file is split and the small one shares a segment
+            tasks = plan(paths, segment_size=4096)
+            self.assertTrue(all(sum(end - start for _, start, end in task) == 4096 for task in tasks[:-1]))
+            self.assertEqual(tasks[-1][-1], (paths[2], 0, 14))
+
+            expected = [(paths[0], len(text[:start].encode('utf-8')), found, value)
+                        for (start, end), found, value in finditer(text, now=now)]
+            expected.append((paths[2], 4, '2013-09-10', Date('2013-09-10')))
+            for workers in (1, 2):
+                records = list(scan_files(paths, workers=workers, segment_size=4096, now=now))
+                self.assertEqual([(r.path, r.offset, r.text, r.start if r.end is None else Range(r.start, r.end))
+                                  for r in records], expected)
+
+            output = io.StringIO()
+            cli.scan(paths[2:], output, now=now)
+            self.assertEqual(json.loads(output.getvalue()), dict(path=paths[2], offset=4, text='2013-09-10',
+                                                                 start='2013-09-10 00:00:00', end=None))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_compact(self):
+        date = Date('2013-09-10T10:45:50', tz='US/Central')
+        for epoch in (False, True):
+            compact = CompactDate.from_date(date, epoch=epoch)
+            self.assertFalse(hasattr(compact, '__dict__'))
+            self.assertEqual(compact.date, date.date)
+            self.assertEqual(compact.tz.zone, 'US/Central')
+            self.assertEqual(compact.to_date(), date)
+            self.assertEqual(compact.original, None)
+        self.assertEqual(CompactDate.from_date(date, keep_original=True).original, '2013-09-10T10:45:50')
+
+        _range = Range('["2013-12-09 06:57:46.54502-05",infinity)')
+        for epoch in (False, True):
+            compact = CompactRange.from_range(_range, epoch=epoch)
+            self.assertFalse(hasattr(compact, '__dict__'))
+            self.assertEqual(compact.start, _range.start)
+            self.assertTrue(compact.end == 'infinity')
+            self.assertTrue(Date('today') in compact)
+            self.assertEqual(compact.to_range(), _range)
+
+        compact = CompactRange.from_range('2010', keep_original=True, epoch=True)
+        self.assertEqual(compact.original, '2010')
+        self.assertEqual(len(compact), len(Range('2010')))
+        self.assertEqual(compact, CompactRange.from_range(Range('2010')))
+        self.assertEqual(len(set([compact, CompactRange.from_range(Range('2010'))])), 1)
+
+        # compact and full values hash alike, each bound keeps its zone
+        for epoch in (False, True):
+            self.assertEqual(len(set([date, CompactDate.from_date(date, epoch=epoch)])), 1)
+            self.assertEqual(len(set([Range('2010'), CompactRange.from_range('2010', epoch=epoch)])), 1)
+            _range = Range(Date('2014-03-06 10:00', tz='US/Eastern'), Date('2014-03-06 18:00', tz='Europe/Paris'))
+            compact = CompactRange.from_range(_range, epoch=epoch)
+            self.assertEqual((compact.start.date, compact.end.date), (_range.start.date, _range.end.date))
+            self.assertEqual(compact.end.tz.zone, 'Europe/Paris')
+            self.assertEqual(compact.key, _range.key)
+            # compared on the key both ways, not through the formatted text
+            self.assertTrue(_range == compact and compact == _range)
+            self.assertFalse(Range(_range.start, _range.end + 1) == compact)
+            self.assertFalse(compact == Range(_range.start, _range.end + 1))
+            precise = Range(datetime(2014, 3, 6, 10, 0, 0, 1), datetime(2014, 3, 6, 10, 0, 0, 2))
+            self.assertTrue(precise == CompactRange.from_range(precise, epoch=epoch))
+            self.assertFalse(Range(datetime(2014, 3, 6, 10), datetime(2014, 3, 6, 10, 0, 0, 2)) == CompactRange.from_range(precise, epoch=epoch))
+
+    def test_range_index(self):
+        ranges = [Range('from january 10th 2010 to february 2nd 2010'),
+                  Range('from january 20th 2010 to january 25th 2010'),
+                  Range('from march 1st 2010 to march 5th 2010'),
+                  Range('["2010-03-03 00:00:00.0-00",infinity)')]
+        index = RangeIndex(ranges[:2])
+        index.add(ranges[2])
+        index.add(ranges[3])
+        self.assertEqual(len(index), 4)
+        self.assertEqual(list(index), ranges)
+
+        self.assertEqual(index.at('jan 21st 2010'), ranges[:2])
+        self.assertEqual(index.at('march 4th 2010'), ranges[2:])
+        self.assertEqual(index.at('infinity'), ranges[3:])
+        self.assertEqual(index.at('feb 20th 2010'), [])
+        self.assertEqual(index.overlapping('from february 1st 2010 to march 2nd 2010'), [ranges[0], ranges[2]])
+        self.assertEqual(index.within('2010'), ranges[:3])
+        self.assertEqual(index.containing('from january 21st 2010 to january 22nd 2010'), ranges[:2])
+        self.assertEqual(RangeIndex([Range('infinity')]).at('today'), [Range('infinity')])
+
+        index.remove(ranges[1])
+        self.assertEqual(index.at('jan 21st 2010'), ranges[:1])
+        self.assertFalse(ranges[1] in index)
+        self.assertRaises(KeyError, index.remove, ranges[1])
+
+    def test_range_set(self):
+        ranges = RangeSet(['from jan 5th 2014 to jan 20th 2014',
+                           Range('from jan 1st 2014 to jan 10th 2014'),
+                           'from march 1st 2014 to march 5th 2014'])
+        self.assertEqual(len(ranges), 2)
+        self.assertEqual(ranges[0], Range('from jan 1st 2014 to jan 20th 2014'))
+        self.assertTrue(Date('jan 15th 2014') in ranges)
+        self.assertFalse(Date('feb 15th 2014') in ranges)
+        self.assertTrue('from jan 2nd 2014 to jan 3rd 2014' in ranges)
+
+        other = RangeSet(['from jan 15th 2014 to feb 1st 2014'])
+        self.assertEqual(ranges | other, ['from jan 1st 2014 to feb 1st 2014', 'from march 1st 2014 to march 5th 2014'])
+        self.assertEqual(ranges & other, ['from jan 15th 2014 to jan 20th 2014'])
+        self.assertEqual(ranges - other, ['from jan 1st 2014 to jan 15th 2014', 'from march 1st 2014 to march 5th 2014'])
+
+        outside = ~ranges
+        self.assertEqual(len(outside), 3)
+        self.assertTrue(outside[0].start == 'infinity')
+        self.assertEqual(outside[0].end, Date('jan 1st 2014'))
+        self.assertTrue(outside[2].end == 'infinity')
+        self.assertTrue(Date('infinity') in outside)
+        self.assertEqual(len(~outside), 2)
+
+        endless = RangeSet(['["2014-01-05 00:00:00.0-00",infinity)'])
+        self.assertTrue(Date('next year') in endless)
+        self.assertEqual(endless - ranges, ['from jan 20th 2014 to march 1st 2014', '["2014-03-05 00:00:00.0-00",infinity)'])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_range_array(self):
+        ranges = [Range('from jan 1st 2014 to jan 10th 2014'),
+                  Range('from feb 1st 2014 to feb 2nd 2014'),
+                  Range('["2013-12-09 06:57:46.54502-05",infinity)')]
+        array = RangeArray.from_ranges(ranges)
+        self.assertEqual(len(array), 3)
+        self.assertEqual(array[0], ranges[0])
+        self.assertTrue(array[2].end == 'infinity')
+        self.assertEqual(list(array), ranges)
+        self.assertEqual(len(array[1:]), 2)
+
+        self.assertEqual(array.contains('jan 5th 2014').tolist(), [True, False, True])
+        self.assertEqual(array.contains(Date('infinity')).tolist(), [False, False, True])
+        points = numpy.array(['2014-01-10', '2014-01-10', '2013-01-01'], dtype='datetime64[us]')
+        self.assertEqual(array.contains(points).tolist(), [True, False, False])
+        self.assertEqual(array.overlaps(Range('from jan 9th 2014 to feb 1st 2014')).tolist(), [True, True, True])
+        self.assertEqual(array.overlaps(array[::-1]).tolist(), [True, True, True])
+
+        durations = array.duration()
+        self.assertEqual(durations[1], numpy.timedelta64(86400, 's'))
+        self.assertTrue(numpy.isnat(durations[2]))
+
+        shifted = array.shift(timedelta(days=1))
+        self.assertEqual(shifted[0], Range('from jan 2nd 2014 to jan 11th 2014'))
+        self.assertTrue(shifted[2].end == 'infinity')
+
+        array = array[[1, 2, 0]]
+        array.sort()
+        self.assertEqual(list(array), [ranges[2], ranges[0], ranges[1]])
+
+        array = RangeArray(array.starts, array.ends, tz='US/Central')
+        self.assertEqual(array[1].start.hour, 18)
+        self.assertEqual(array[1].start.tz.zone, 'US/Central')
+
+    def test_now(self):
+        now = datetime(2014, 3, 6, 23, 59, 59)
+        self.assertEqual(Date('today', now=now).date, datetime(2014, 3, 6))
+        self.assertEqual(Date('tomorrow', now=now).date, datetime(2014, 3, 7))
+        self.assertEqual(Date('now', now=now).date, now)
+        self.assertEqual(Date('today about this time', now=now).minute, 59)
+        self.assertEqual(Date('march 1st', now=now).year, 2014)
+        self.assertEqual(Date('noon', tz='US/Central', now=now).day, 6)
+
+        _range = Range('this month', now=now)
+        self.assertEqual(_range.start.date, datetime(2014, 3, 1))
+        self.assertEqual(_range.end.date, datetime(2014, 4, 1))
+        self.assertEqual(Range('last 7 days', now=now).end.date, datetime(2014, 3, 7))
+        self.assertEqual(Range('this week', now=now).start.date, datetime(2014, 3, 3))
+        self.assertEqual(Range('next 2 weeks', now=now).start.date, datetime(2014, 3, 6))
+
+        self.assertEqual(findall('born 3 weeks ago', now=now)[0][1].date, datetime(2014, 2, 13))
+        self.assertEqual(parse('tuesday at 10pm', now=now)['day'], 4)
+
+        cache.enable_cache()
+        try:
+            self.assertEqual(Date('today', now=now).date, datetime(2014, 3, 6))
+            self.assertEqual(Date('today', now=now + timedelta(seconds=1)).date, datetime(2014, 3, 7))
+            self.assertEqual(cache.cache_info().expirations, 1)
+        finally:
+            cache.disable_cache()
+
+    def test_benchmark_compare(self):
+        from benchmarks.run import compare
+        baseline = dict(benchmarks=dict(a=dict(seconds=1.0), b=dict(seconds=1.0)))
+        results = dict(benchmarks=dict(a=dict(seconds=1.2), b=dict(seconds=1.3), c=dict(seconds=9.0)))
+        self.assertEqual([r[0] for r in compare(results, baseline, 0.25)], ['b'])
+        self.assertEqual(compare(results, baseline, 0.5), [])
+
+    def test_ordering(self):
+        import heapq
+        from bisect import bisect_left
+        dates = [Date(datetime(2014, 3, day)) for day in (5, 1, 9, 3)]
+        self.assertEqual([d.day for d in sorted(dates)], [1, 3, 5, 9])
+        self.assertEqual(heapq.nsmallest(1, dates)[0].day, 1)
+        self.assertEqual(bisect_left(sorted(dates), Date(datetime(2014, 3, 4))), 2)
+        self.assertEqual(Date(datetime(2014, 3, 1)).key, epoch_us(datetime(2014, 3, 1)))
+        self.assertTrue(Date('infinity') > Date(datetime(2014, 3, 1)))
+        self.assertTrue(Date(datetime(2014, 3, 1)) <= Date(datetime(2014, 3, 1)))
+        self.assertEqual(len(set([Date(datetime(2014, 3, 1)), Date(datetime(2014, 3, 1)), Date('infinity')])), 2)
+
+        # copies made by adjust() carry the cached key of the original
+        date = Date(datetime(2014, 3, 1))
+        key = date.key
+        date = date.adjust('1 day')
+        self.assertEqual(date.key - key, 86400 * 1000000)
+
+        ranges = [Range(datetime(2014, 3, 1), datetime(2014, 3, 5)),
+                  Range(datetime(2014, 3, 1), datetime(2014, 3, 3)),
+                  Range('infinity', datetime(2014, 1, 1)),
+                  Range(datetime(2014, 2, 1), 'infinity')]
+        ordered = sorted(ranges)
+        self.assertEqual(ordered[0].start, 'infinity')
+        self.assertEqual(ordered[1].end, 'infinity')
+        self.assertEqual([r.end.day for r in ordered[2:]], [3, 5])
+        self.assertTrue(ranges[1] < ranges[0] and not ranges[0] < ranges[1])
+        self.assertTrue(ranges[1] <= ranges[0] and ranges[0] >= ranges[1])
+        self.assertEqual(len(set(ranges + [Range(datetime(2014, 3, 1), datetime(2014, 3, 3))])), 4)
+
+        # a naive value is compared with an aware one on the wall clock
+        naive, aware = Date('2014-03-06 10:00'), Date('2014-03-06 10:00', tz='US/Eastern')
+        self.assertTrue(naive == aware and aware == naive)
+        self.assertFalse(naive != aware)
+        self.assertTrue(naive <= aware and naive >= aware and aware <= naive and aware >= naive)
+        self.assertFalse(naive < aware or naive > aware)
+        self.assertTrue(Date(datetime(2014, 3, 6, 10), tz='UTC') == Date(datetime(2014, 3, 6, 10)))
+        self.assertEqual(len(set([Date(datetime(2014, 3, 6, 10), tz='UTC'), Date(datetime(2014, 3, 6, 10))])), 1)
+        self.assertTrue(Range('2014-03-01', '2014-03-02') == Range('2014-03-01', '2014-03-02', tz='US/Eastern'))
+        self.assertTrue(Range('2014-03-01', '2014-03-02', tz='US/Eastern') == Range('2014-03-01', '2014-03-02'))
+        # the start and end of an aware range hold naive dates at the same wall clock
+        self.assertTrue(Date('2014-03-01') in Range('2014-03-01', '2014-03-02', tz='US/Eastern'))
+        self.assertTrue(Date('2014-03-02') in Range('2014-03-01', '2014-03-02', tz='US/Eastern'))
+        self.assertFalse(Date('2014-03-02 00:00:01') in Range('2014-03-01', '2014-03-02', tz='US/Eastern'))
+
+        # aware dates are equal on their instant, pytz zones attached by replace included
+        eastern = Date(datetime(2014, 3, 6, 10), tz='US/Eastern')
+        self.assertEqual(eastern.date.utcoffset(), timedelta(hours=-4, minutes=-56))
+        self.assertEqual(eastern, Date(datetime(2014, 3, 6, 15), tz='UTC'))
+        self.assertEqual(len(set([eastern, Date(datetime(2014, 3, 6, 15), tz='UTC')])), 1)
+
+    def test_iter(self):
+        days = Range(datetime(2014, 3, 1), datetime(2014, 3, 4)).iter('1 day')
+        self.assertEqual(next(days), Range(datetime(2014, 3, 1), datetime(2014, 3, 2)))
+        self.assertEqual(len(list(days)), 2)
+
+        # the last step is cut at the end
+        hours = list(Range(datetime(2014, 3, 1), datetime(2014, 3, 1, 5)).iter('two hours'))
+        self.assertEqual([h.end.hour for h in hours], [2, 4, 5])
+        self.assertEqual(len(list(Range(datetime(2014, 3, 1), datetime(2014, 3, 2)).iter(timedelta(minutes=15)))), 96)
+
+        # calendar months clamp the day, without drifting
+        months = list(Range(datetime(2014, 1, 31), datetime(2014, 5, 31)).iter('1 month'))
+        self.assertEqual([(m.start.month, m.start.day) for m in months], [(1, 31), (2, 28), (3, 31), (4, 30)])
+        self.assertEqual([q.start.month for q in Range(datetime(2014, 1, 1), datetime(2015, 1, 1)).iter('quarter')], [1, 4, 7, 10])
+
+        parts = list(Range(datetime(2014, 3, 1), datetime(2014, 3, 2)).split(3))
+        self.assertEqual([p.start.hour for p in parts], [0, 8, 16])
+        self.assertEqual(parts[-1].end, Date(datetime(2014, 3, 2)))
+
+        week = Range(datetime(2014, 3, 3), datetime(2014, 3, 10))
+        self.assertEqual(week.next(), Range(datetime(2014, 3, 10), datetime(2014, 3, 17)))
+        self.assertEqual(week.next(2), Range(datetime(2014, 3, 17), datetime(2014, 3, 24)))
+        self.assertEqual(week.prev(3), Range(datetime(2014, 2, 10), datetime(2014, 2, 17)))
+
+        self.assertRaises(TimestringInvalid, lambda: list(week.iter('0 days')))
+        self.assertRaises(TimestringInvalid, lambda: list(week.iter('fortnight')))
+        self.assertRaises(TimestringInvalid, lambda: list(Range('infinity', datetime(2014, 1, 1)).iter('1 day')))
+
+    def test_delta(self):
+        from timestring import Delta
+        self.assertTrue(Delta.parse('1 day') is Delta.parse('1 day'))
+        self.assertEqual(Delta.parse('two weeks'), Delta(weeks=2))
+        self.assertEqual(Delta.parse('-3 months'), Delta(months=-3))
+        self.assertEqual(Delta.parse('1 year'), Delta(months=12))
+        self.assertEqual(Delta.parse('2 weeks') + '1 day', Delta(weeks=2, days=1))
+        self.assertEqual(-Delta(hours=1) * 2, Delta(hours=-2))
+        self.assertEqual(str(Delta(weeks=2, days=1)), '2 weeks 1 day')
+        self.assertRaises(TimestringInvalid, Delta.parse, 'nothing')
+
+        # calendar months clamp the day
+        date = Date(datetime(2014, 1, 31, 10))
+        self.assertEqual((date + Delta(months=1)).date, datetime(2014, 2, 28, 10))
+        self.assertEqual((date + '13 months').date, datetime(2015, 2, 28, 10))
+        self.assertEqual((date - '2 months').date, datetime(2013, 11, 30, 10))
+        self.assertEqual((date + '1 quarter').date, datetime(2014, 4, 30, 10))
+        self.assertEqual((Date(datetime(2012, 2, 29)) + '1 year').date, datetime(2013, 2, 28))
+        self.assertEqual((date - Delta(days=1, hours=10)).date, datetime(2014, 1, 30))
+
+        _range = Range(datetime(2014, 1, 31), datetime(2014, 2, 1))
+        self.assertEqual(_range + Delta(days=1), Range(datetime(2014, 2, 1), datetime(2014, 2, 2)))
+        self.assertEqual(_range - '1 month', Range(datetime(2013, 12, 31), datetime(2014, 1, 1)))
+        self.assertEqual(len(list(Range(datetime(2014, 1, 1), datetime(2014, 1, 2)).iter(Delta(hours=6)))), 4)
+
+    def test_tokenizer(self):
+        from timestring import set_engine, get_engine
+        from timestring.tokenizer import TOKENS, GROUPS
+        from timestring.timestring_re import TIMESTRING_RE
+        self.assertEqual(GROUPS, tuple(sorted(TIMESTRING_RE.groupindex, key=TIMESTRING_RE.groupindex.get)))
+
+        # differential against the regex over every combination the grammar branches on
+        words = ("jan march may sept august dec mon monday tuesdays thur sun today now tomorrow next last "
+                 "previous this the of on at and to @ between from before after greater than then less a "
+                 "day days d h m s y week months quarter years ago couple four fourteen fifty sixteen eighty "
+                 "eleven twenty hundred noon afternoon morning evening midnight around near time am pm p "
+                 "o'clock T 1 2 5 9 10 12 15 20 23 31 45 60 2012 2014 1999 05 '12 1374681560 th st rd "
+                 "know saturn mayor >= < ,").split()
+        glue = ["", " ", "  ", "/", "-", ":", ", ", " at ", "\n"]
+        rng = random.Random(2014)
+        corpus = []
+        for _ in range(3000):
+            text = "".join(rng.choice(words) + rng.choice(glue) for _ in range(rng.randint(1, 7)))
+            corpus.append(text.upper() if rng.random() < 0.2 else text)
+        corpus.append("once upon a time, about 3 weeks ago, there was a boy whom was born on august 15th at 7:20 am. epic.")
+
+        def matches(pattern, text):
+            return [(match.span(), match.group(1), match.groupdict()) for match in pattern.finditer(text)]
+
+        for text in corpus:
+            self.assertEqual(matches(TOKENS, text), matches(TIMESTRING_RE, text), text)
+
+        # the regex needs seconds for this, the tokenizer stays linear
+        start = time.time()
+        self.assertEqual(TOKENS.search("12345678 " * 200 + "!"), None)
+        self.assertEqual(TOKENS.search("1 " * 5000 + "!"), None)
+        self.assertLess(time.time() - start, 2)
+
+        self.assertEqual(get_engine(), 'regex')
+        self.assertRaises(ValueError, set_engine, 'pyparsing')
+        now = datetime(2014, 3, 6, 12, 30)
+        phrases = ["may 23rd, 1988 at 6:24 am", "tomorrow at 10:15:30", "sixty days ago", "2012/12/11"]
+        text = "born on august 15th at 7:20 am, 3 weeks ago"
+        expected = [Date(phrase, now=now) for phrase in phrases], Range('last 7 days', now=now), findall(text, now=now)
+        try:
+            set_engine('tokens')
+            self.assertEqual(([Date(phrase, now=now) for phrase in phrases], Range('last 7 days', now=now), findall(text, now=now)),
+                             expected)
+        finally:
+            set_engine('regex')
+
+    def test_duration(self):
+        from timestring import Duration
+        _range = Range(datetime(2014, 1, 1), datetime(2015, 2, 3, 6))
+        duration = _range.duration
+        self.assertTrue(duration is _range.duration)
+        self.assertEqual(duration, timedelta(days=398, hours=6))
+        self.assertEqual(duration.parts, (1, 1, 3, 6, 0, 0))
+        self.assertEqual(_range.elapse, '1 year 1 month 3 days 6 hours')
+        self.assertEqual(duration.format(short=True), '1y 1m 3d 6h')
+        self.assertEqual(duration.format(round='days'), '1 year 1 month 3 days')
+        self.assertEqual(duration.format(round='months'), '1 year 1 month')
+        self.assertEqual(duration.format(min='hours'), '1 year 1 month 3 days')
+        self.assertEqual(str(-Duration(90 * 1000000)), '-1 minute -30 seconds')
+        self.assertEqual(str(Duration()), '0 seconds')
+        self.assertRaises(TimestringInvalid, duration.format, round='seconds')
+        hour = 3600 * 1000000
+        self.assertEqual(Duration(hour * 12 + hour // 2).format(round='days'), '1 day')
+        self.assertEqual(Duration(hour * 12).format(round='days'), '1 day')
+        self.assertEqual(Duration(hour * 12 - 1).format(round='days'), '0 seconds')
+        self.assertEqual(Duration(hour * (29 * 24 + 13)).format(round='days'), '1 month')
+        self.assertEqual(Duration(-hour * 36).format(round='days'), '-2 days')
+        self.assertEqual(Range('2014-01-01', 'infinity').duration, None)
+        self.assertEqual(Range('2014-01-01', 'infinity').elapse, 'infinity')
+
+        # replacing a date measures again
+        _range.end.date = datetime(2014, 1, 2)
+        self.assertEqual(_range.elapse, '1 day')
+
+        # arithmetic
+        hour = Duration.from_timedelta(timedelta(hours=1))
+        self.assertEqual((Date(datetime(2014, 1, 1)) + hour).date, datetime(2014, 1, 1, 1))
+        self.assertEqual((Date(datetime(2014, 1, 1)) - hour * 2).date, datetime(2013, 12, 31, 22))
+        self.assertEqual(_range - hour, Range(datetime(2013, 12, 31, 23), datetime(2014, 1, 1, 23)))
+        self.assertEqual(len(list(_range.iter(hour * 6))), 4)
+        self.assertEqual(hour + timedelta(minutes=30), Duration(5400000000))
+        self.assertTrue(hour < timedelta(hours=2) and hash(hour) == hash(timedelta(hours=1)))
+
+    def test_buckets(self):
+        days = Range(datetime(2014, 3, 1), datetime(2014, 3, 4)).buckets('day')
+        self.assertEqual(len(days), 3)
+        self.assertEqual(days[-1], Range(datetime(2014, 3, 3), datetime(2014, 3, 4)))
+        points = [datetime(2014, 3, 2, 10), datetime(2014, 2, 1), datetime(2014, 3, 1), datetime(2014, 3, 4),
+                  datetime(2014, 3, 4, 0, 0, 1), Date('2014-03-03 12:00'), Date('infinity'), 1393718400]
+        self.assertEqual(days.assign(points), [1, -1, 0, 2, -1, 2, -1, 1])
+        self.assertEqual(days.histogram(points), [1, 2, 2])
+        self.assertEqual(days.index(datetime(2014, 3, 3, 23, 59)), 2)
+
+        # buckets fall on the calendar whatever the start, the first and last cut to the range
+        months = Range(datetime(2014, 1, 15, 10, 30), datetime(2014, 5, 20)).buckets('month')
+        self.assertEqual(months.edges, [datetime(2014, 1, 15, 10, 30), datetime(2014, 2, 1), datetime(2014, 3, 1),
+                                        datetime(2014, 4, 1), datetime(2014, 5, 1), datetime(2014, 5, 20)])
+        self.assertEqual(months.index(datetime(2014, 2, 28, 23)), 1)
+        self.assertEqual(months.index(datetime(2014, 1, 15)), -1)
+        self.assertEqual(Range(datetime(2014, 2, 15), datetime(2015, 1, 1)).buckets('quarter').edges[:3],
+                         [datetime(2014, 2, 15), datetime(2014, 4, 1), datetime(2014, 7, 1)])
+        # wednesday, weeks start on mondays
+        weeks = Range(datetime(2014, 3, 5, 10, 30), datetime(2014, 3, 20)).buckets('week')
+        self.assertEqual(weeks.edges, [datetime(2014, 3, 5, 10, 30), datetime(2014, 3, 10), datetime(2014, 3, 17), datetime(2014, 3, 20)])
+        self.assertEqual(Range(datetime(2014, 3, 5, 10, 30), datetime(2014, 3, 6)).buckets('6 hours').edges,
+                         [datetime(2014, 3, 5, 10, 30), datetime(2014, 3, 5, 12), datetime(2014, 3, 5, 18), datetime(2014, 3, 6)])
+        quarters = Range(datetime(2014, 1, 1), datetime(2015, 1, 1)).buckets('quarter')
+        self.assertEqual(quarters.edges[1:4], [datetime(2014, 4, 1), datetime(2014, 7, 1), datetime(2014, 10, 1)])
+        self.assertEqual(len(Range(datetime(2014, 1, 1), datetime(2014, 2, 1)).buckets('6 hours')), 124)
+        self.assertRaises(TimestringInvalid, Range('2014-01-01', 'infinity').buckets, 'day')
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_buckets_numpy(self):
+        # NumPy points agree with the bisect ones
+        quarters = Range(datetime(2014, 1, 1), datetime(2015, 1, 1)).buckets('quarter')
+        rng = random.Random(5)
+        stamps = [datetime(2013, 12, 1) + timedelta(seconds=rng.randint(0, 400 * 86400)) for _ in range(2000)]
+        stamps += quarters.edges
+        array = numpy.array(stamps, dtype='datetime64[us]')
+        self.assertEqual(quarters.assign(array).tolist(), quarters.assign(stamps))
+        self.assertEqual(quarters.histogram(array).tolist(), quarters.histogram(stamps))
+        self.assertEqual(quarters.assign(numpy.array([1388534400.0, float('nan')])).tolist(), [0, -1])
+        self.assertEqual(quarters.assign(numpy.array(['NaT'], dtype='datetime64[us]')).tolist(), [-1])
+
+    def test_instrument(self):
+        import logging
+        from timestring import stats, instrumented, instrument, timestring_re
+        now = datetime(2014, 3, 6, 12, 30)
+        init = Date.__dict__['__init__']
+        with instrumented() as recorder:
+            findall("about 3 weeks ago, born on august 15th at 7:20 am", now=now)
+            Date("2013-09-10")
+            self.assertRaises(TimestringInvalid, Date, "nope")
+            self.assertTrue(Date("2014-01-05") in Range("2014", now=now))
+            Date("today", tz="US/Eastern", now=now)
+        snapshot = recorder.snapshot()
+        self.assertEqual(snapshot, dict(stats(), elapsed=snapshot['elapsed']))
+        self.assertEqual(set(snapshot['branches']), set(('relative', 'month', 'time', 'numeric', 'named_day')))
+        self.assertEqual(set(snapshot['tiers']), set(('Date.regex', 'Date.iso', 'Date.literal', 'Range.regex')))
+        self.assertEqual(snapshot['failures'], dict(Date=1, search=1))
+        for name in ('search', 'Date', 'Range', 'contains', 'compare', 'tz', 'text2num'):
+            stage = snapshot['stages'][name]
+            self.assertTrue(stage['count'] and stage['seconds'] >= stage['self'] >= 0, name)
+        # dates built by ranges and comparisons are nested
+        self.assertTrue(snapshot['stages']['Date']['nested'])
+        self.assertEqual(snapshot['cache'], None)
+
+        # off again, with the originals back
+        self.assertTrue(instrument.RECORDER is None and Date.__dict__['__init__'] is init)
+        self.assertTrue(timestring_re.PATTERN is timestring_re.TIMESTRING_RE)
+
+        # verbose parses are traced rather than printed
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger('timestring')
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        try:
+            Date("august 15th", verbose=True)
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(logging.NOTSET)
+        self.assertEqual([(r.event, r.fields['groups']) for r in records],
+                         [('match', dict(main='august 15th', month='august', date='15'))])
+
+    def test_import_time(self):
+        import sys
+        import subprocess
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+
+        def import_time():
+            err = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', 'import timestring'],
+                                   stderr=subprocess.PIPE, env=env).communicate()[1]
+            for line in err.decode().splitlines():
+                if line.split('|')[-1].strip() == 'timestring':
+                    return int(line.split('|')[1]) / 1000.0
+
+        budget = float(os.environ.get('TIMESTRING_IMPORT_BUDGET_MS', 150))
+        self.assertLess(min(import_time() for _ in range(3)), budget)
+
+        # nothing heavy happens until it is needed
+        out = subprocess.Popen([sys.executable, '-c', 'import sys, timestring; '
+                                'from timestring.timestring_re import TIMESTRING_RE; '
+                                'print(" ".join(sorted(m for m in ("argparse", "pytz", "psycopg2", "timestring.cli") if m in sys.modules))); '
+                                'print(repr(TIMESTRING_RE))'],
+                               stdout=subprocess.PIPE, env=env).communicate()[0]
+        self.assertEqual(out.decode().split('\n')[:2], ['', '<timestring.LazyPattern pending>'])
+
+    def test_timezones(self):
+        from timestring import timezones
+        self.assertTrue(timezones.resolve('US/Eastern') is timezones.resolve('US/Eastern'))
+        self.assertEqual(timezones.name(timezones.resolve('US/Eastern')), 'US/Eastern')
+        self.assertEqual(timezones.us_dst(2014), (datetime(2014, 3, 9, 2), datetime(2014, 11, 2, 2)))
+        self.assertRaises(ValueError, timezones.set_backend, 'dateutil')
+
+        now = datetime(2014, 1, 10, 13, 30)
+        self.assertEqual(Date('today', tz='Australia/Sydney', now=now).day, 11)
+        try:
+            timezones.set_backend('zoneinfo')
+        except ImportError:
+            return
+        try:
+            date = Date('2014-01-10 10:00', tz='Australia/Sydney')
+            self.assertEqual(date.date.utcoffset(), timedelta(hours=11))
+            self.assertEqual(date.key, epoch_us(datetime(2014, 1, 9, 23)))
+            self.assertEqual(Date('today', tz='Australia/Sydney', now=now).day, 11)
+            self.assertEqual(Date('today', tz='Europe/London', now=now).day, 10)
+        finally:
+            timezones.set_backend('pytz')
+
+    @unittest.skipIf(sys.version_info < (3, 6), "async generators need python 3.6+")
+    def test_aio(self):
+        # no async syntax here, this module still has to compile on python 2
+        import asyncio
+        from timestring import aio
+        now = datetime(2014, 3, 6, 12, 30)
+        text = "We met 3 weeks ago, again on august 15th at 7:20 am and then next week. " * 40
+        expected = findall(text, now=now)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        class Chunks(object):
+            def __init__(self, data, size):
+                self.chunks = iter([data[i:i + size] for i in range(0, len(data), size)])
+
+            def __aiter__(self):
+                return self
+
+            def __anext__(self):
+                future = loop.create_future()
+                chunk = next(self.chunks, None)
+                if chunk is None:
+                    future.set_exception(StopAsyncIteration())
+                else:
+                    future.set_result(chunk)
+                return future
+
+        def collect(found):
+            items = []
+            while True:
+                try:
+                    items.append(loop.run_until_complete(found.__anext__()))
+                except StopAsyncIteration:
+                    return items
+
+        try:
+            self.assertEqual(loop.run_until_complete(aio.afindall(text[:80], now=now)), findall(text[:80], now=now))
+            self.assertEqual(loop.run_until_complete(aio.afindall(text, now=now)), expected)
+
+            offloader = aio.Offloader(concurrency=1, inline_size=64)
+            found = collect(aio.afinditer(Chunks(text, 100), now=now, offloader=offloader))
+            self.assertEqual([(match, value) for span, match, value in found], expected)
+            # bytes, split within a multi-byte character
+            data = u"caf\u00e9 on august 15th at 7:20 am".encode('utf-8')
+            found = collect(aio.afinditer(Chunks(data, 4), now=now))
+            self.assertEqual([match for span, match, value in found], ['august 15th at 7:20 am'])
+            # a bytes source is one chunk, not a sequence of ints
+            found = collect(aio.afinditer(data, now=now))
+            self.assertEqual([match for span, match, value in found], ['august 15th at 7:20 am'])
+            # a character cut off at the end raises
+            found = aio.afinditer(Chunks(data + b'\xc3', 4), now=now)
+            self.assertRaises(UnicodeDecodeError, collect, found)
+
+            # concurrent callers share the limit
+            results = loop.run_until_complete(asyncio.gather(*[aio.afindall(text, now=now, offloader=offloader)
+                                                               for _ in range(4)]))
+            self.assertEqual(results, [expected] * 4)
+
+            if numpy is not None:
+                strings = ["2013-09-10", "nope"] * 50
+                values, valid = loop.run_until_complete(aio.aparse_many(strings, now=now, batch_size=30))
+                expected_values, expected_valid = parse_many(strings, now=now)
+                self.assertTrue((values.view('int64') == expected_values.view('int64')).all())
+                self.assertTrue((valid == expected_valid).all())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def test_postgres_copy(self):
+        import pytz
+        from timestring import postgres
+        week = Range(datetime(2014, 3, 3), datetime(2014, 3, 10))
+        rows = [(1, week, None, 'tab\there'),
+                (2, Range('infinity', datetime(2000, 1, 2)), Date('infinity'), u'caf\u00e9'),
+                (3, Range(datetime(2014, 3, 3), 'infinity'), Date(datetime(2014, 7, 1, 12, tzinfo=pytz.timezone('US/Eastern'))), '')]
+
+        output = io.StringIO()
+        postgres.write_copy(rows, output)
+        self.assertEqual(output.getvalue(),
+                         u'1\t["2014-03-03 00:00:00","2014-03-10 00:00:00")\t\\N\ttab\\there\n'
+                         u'2\t(,"2000-01-02 00:00:00")\tinfinity\tcaf\u00e9\n'
+                         u'3\t["2014-03-03 00:00:00",)\t2014-07-01 16:00:00+00\t\n')
+
+        output = io.BytesIO()
+        postgres.write_copy([(week, ), (Range('infinity', datetime(2000, 1, 2)), Date('infinity'), None, u'caf\u00e9')],
+                            output, format='binary')
+        self.assertEqual(output.getvalue(), bytes(bytearray.fromhex(
+            '5047434f50590aff0d0a00' '00000000' '00000000'
+            '0001' '00000019' '02' '00000008' '000196a73cc5a000' '00000008' '000197340da94000'
+            '0004' '0000000d' '08' '00000008' '000000141dd76000'
+            '00000008' '7fffffffffffffff' 'ffffffff' '00000005' '636166c3a9'
+            'ffff')))
+
+        stream = postgres.CopyStream([(i, week) for i in range(20)])
+        chunks = iter(lambda: stream.read(7), '')
+        self.assertEqual(''.join(chunks), ''.join(postgres.copy_rows([(i, week) for i in range(20)])))
+        self.assertRaises(TypeError, lambda: list(postgres.copy_rows([(1, )], format='binary')))
+
+    def test_postgres_decode(self):
+        from timestring import postgres
+        self.assertEqual(postgres.decode_timestamp('2014-03-06 15:33:43.764419-05'), datetime(2014, 3, 6, 20, 33, 43, 764419))
+        self.assertEqual(postgres.decode_timestamp('2014-03-06 15:33:43.5+05:30'), datetime(2014, 3, 6, 10, 3, 43, 500000))
+        self.assertEqual(postgres.decode_timestamp('2014-03-06 15:33:43'), datetime(2014, 3, 6, 15, 33, 43))
+        self.assertEqual(postgres.decode_timestamp('infinity'), 'infinity')
+        self.assertRaises(TimestringInvalid, postgres.decode_timestamp, '-infinity')
+        self.assertRaises(TimestringInvalid, postgres.decode_timestamp, '0044-03-15 00:00:00 BC')
+
+        # same as the pg literal branch of Range
+        literal = '["2014-03-06 15:33:43.764419-05","2014-03-07 15:33:43.1-05")'
+        self.assertEqual(postgres.decode_range(literal), Range(literal))
+
+        ranges = postgres.decode_ranges(['["2014-03-03 00:00:00","2014-03-10 00:00:00")',
+                                         '(,"2014-03-07 00:00:00+00")',
+                                         '["2014-03-06 15:33:43-05",infinity)',
+                                         'empty', None])
+        self.assertEqual(ranges[0], Range(datetime(2014, 3, 3), datetime(2014, 3, 10)))
+        self.assertEqual((ranges[1].start, ranges[1].end), ('infinity', Date(datetime(2014, 3, 7))))
+        self.assertEqual((ranges[2].start, ranges[2].end), (Date(datetime(2014, 3, 6, 20, 33, 43)), 'infinity'))
+        self.assertEqual(ranges[3:], [None, None])
+
+        # each side only takes its own infinity
+        ranges = postgres.decode_ranges(['[-infinity,"2014-03-07 00:00:00")', '["2014-03-07 00:00:00",infinity)'])
+        self.assertEqual((ranges[0].start, ranges[0].end), ('infinity', Date(datetime(2014, 3, 7))))
+        self.assertEqual((ranges[1].start, ranges[1].end), (Date(datetime(2014, 3, 7)), 'infinity'))
+        self.assertRaises(TimestringInvalid, postgres.decode_range, '["2014-03-07 00:00:00",-infinity)')
+        self.assertRaises(TimestringInvalid, postgres.decode_range, '[infinity,"2014-03-07 00:00:00")')
+
+        dates = postgres.decode_timestamps(['2014-03-06 15:33:43', None, '2014-03-06 15:33:43', 'infinity'])
+        self.assertEqual(dates[0], Date(datetime(2014, 3, 6, 15, 33, 43)))
+        self.assertEqual(dates[1:3], [None, dates[0]])
+        self.assertEqual(dates[3], 'infinity')
+
+        # what COPY writes decodes back
+        week = Range(datetime(2014, 3, 3), datetime(2014, 3, 10))
+        self.assertEqual(postgres.decode_range(postgres.text_range(week)), week)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_interop(self):
+        from timestring import interop
+        ranges = [Range('2014-01-01 to 2014-02-01', tz='US/Eastern'),
+                  Range('2014-03-01', 'infinity', tz='US/Eastern'),
+                  Range('infinity', '2014-05-01', tz='US/Eastern')]
+        array = RangeArray.from_ranges(ranges, tz='US/Eastern')
+        try:
+            import pyarrow
+        except ImportError:
+            pyarrow = None
+        if pyarrow:
+            column = interop.to_arrow(ranges)
+            self.assertEqual(column.type.field('start').type, pyarrow.timestamp('us', tz='US/Eastern'))
+            self.assertEqual(column.field('end')[1].value, 2 ** 63 - 1)
+            back = interop.from_arrow(pyarrow.chunked_array([column]))
+            self.assertEqual(list(back), ranges)
+            self.assertEqual(back.tz.zone, 'US/Eastern')
+            self.assertEqual(list(interop.from_arrow(column.slice(1))), ranges[1:])
+
+            # RangeArray buffers are shared both ways
+            contiguous = RangeArray(array._starts.copy(), array._ends.copy())
+            self.assertTrue(numpy.shares_memory(interop.from_arrow(interop.to_arrow(contiguous))._starts, contiguous._starts))
+
+            # other units are scaled, their sentinels kept
+            millis = pyarrow.array([1388552400000, -(2 ** 63 - 1)], type=pyarrow.timestamp('ms', tz='UTC'))
+            nanos = pyarrow.array([1391230800000000000, 2 ** 63 - 1], type=pyarrow.timestamp('ns', tz='UTC'))
+            back = interop.from_arrow(pyarrow.StructArray.from_arrays([millis, nanos], names=['lower', 'upper']))
+            self.assertEqual(list(back), [ranges[0], Range('infinity', 'infinity')])
+            self.assertRaises(ValueError, interop.from_arrow, pyarrow.array([None, {'start': 0, 'end': 1}], type=column.type))
+        try:
+            import pandas
+        except ImportError:
+            pandas = None
+        if pandas:
+            index = interop.to_interval_index(array)
+            self.assertEqual(str(index.left.tz), 'US/Eastern')
+            self.assertEqual(index.right[1].value, interop.PANDAS_INFINITY_NS)
+            self.assertEqual(index.left[2].value, interop.PANDAS_NEG_INFINITY_NS)
+            back = interop.from_interval_index(index)
+            self.assertEqual(list(back), ranges)
+            self.assertTrue((back._starts == array._starts).all() and (back._ends == array._ends).all())
+            self.assertRaises(ValueError, interop.to_interval_index, [Range(datetime(1500, 1, 1), datetime(1501, 1, 1))])
+
 
 def main():
     os.environ['TZ'] = 'UTC'
@@ -0,0 +1,141 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from timestring.Date import Date, epoch_us
+from timestring.Range import Range, _step
+from timestring.vectorized import _numpy
+
+try:
+    long
+except NameError:
+    long = int
+
+
+def _floor(date, step):
+    """Returns the calendar boundary of `step` at or before the datetime `date`"""
+    midnight = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    months = step.total_months
+    if months:
+        index = date.year * 12 + date.month - 1
+        index -= index % months
+        return midnight.replace(year=index // 12, month=index % 12 + 1, day=1)
+    delta = step.timedelta
+    if delta.days:
+        if delta.days % 7 == 0 and not delta.seconds and not delta.microseconds:
+            return midnight - timedelta(days=date.weekday())
+        return midnight
+    size = delta.seconds * 1000000 + delta.microseconds
+    elapsed = date - midnight
+    elapsed = elapsed.seconds * 1000000 + elapsed.microseconds
+    return midnight + timedelta(microseconds=elapsed - elapsed % size)
+
+
+class Buckets(object):
+    """Consecutive ranges of one step covering a range, see `Range.buckets`
+
+    >>> days = Range('2014-03-01 to 2014-03-04').buckets('day')
+    >>> days.assign([datetime(2014, 3, 2, 10), datetime(2014, 2, 1), datetime(2014, 3, 1)])
+    [1, -1, 0]
+    >>> days.histogram([datetime(2014, 3, 2, 10), datetime(2014, 3, 2, 11)])
+    [0, 2, 0]
+
+    Buckets fall on the calendar: steps of months start on the first of a
+    month, quarters and years on the first of a quarter and year, weeks on
+    mondays, days at midnight and shorter steps on their multiple since
+    midnight. The first and last buckets are cut to the range. Each holds its
+    start and not its end, except the last which holds the end of the range
+    too.
+
+    Points are datetimes, Dates or epoch seconds, or NumPy arrays of
+    datetime64 or epoch seconds, which are assigned with `searchsorted`
+    rather than one `bisect` each. Naive datetimes are compared as UTC,
+    like `epoch_us`.
+    """
+    def __init__(self, _range, step='1 day'):
+        start, end = _range._finite()
+        step = _step(step)
+        self.range = _range
+        self.step = step
+        first = _floor(start, step)
+        edges, index = [start], 1
+        while edges[-1] < end:
+            edges.append(min(step.apply(first, index), end))
+            index += 1
+        self.edges = edges
+        # epoch microseconds of the edges, what points are searched in
+        self._keys = [epoch_us(edge) for edge in edges]
+        self._numpy_keys = None
+
+    def __len__(self):
+        return len(self.edges) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("bucket index out of range")
+        return Range(self.edges[index], self.edges[index + 1])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return "<timestring.Buckets %d of %s %s>" % (len(self), self.step, self.range)
+
+    def _key(self, point):
+        if isinstance(point, datetime):
+            return epoch_us(point)
+        if isinstance(point, Date):
+            return None if point.date == 'infinity' else epoch_us(point.date)
+        if isinstance(point, (int, long, float)):
+            return int(point * 1000000)
+        return epoch_us(Date(point).date)
+
+    def index(self, point):
+        """Returns the index of the bucket holding `point`, -1 when outside of the range"""
+        keys = self._keys
+        key = self._key(point)
+        if key is None or key < keys[0] or key > keys[-1]:
+            return -1
+        return min(bisect_right(keys, key), len(keys) - 1) - 1
+
+    def _array(self, points):
+        numpy = _numpy()
+        if self._numpy_keys is None:
+            self._numpy_keys = numpy.array(self._keys, dtype='int64')
+        if points.dtype.kind == 'M':
+            keys = points.astype('datetime64[us]').view('int64')
+        else:
+            keys = (numpy.nan_to_num(points) * 1000000).astype('int64')
+        index = numpy.searchsorted(self._numpy_keys, keys, side='right') - 1
+        # the end of the range belongs to the last bucket
+        index[keys == self._numpy_keys[-1]] = len(self) - 1
+        outside = (keys < self._numpy_keys[0]) | (keys > self._numpy_keys[-1])
+        if points.dtype.kind == 'M':
+            outside |= numpy.isnat(points)
+        elif points.dtype.kind == 'f':
+            outside |= numpy.isnan(points)
+        index[outside] = -1
+        return index
+
+    def assign(self, points):
+        """Returns the bucket index of each point, -1 for those outside of the range
+
+        A NumPy array of points returns an array of indices.
+        """
+        if hasattr(points, 'dtype'):
+            return self._array(points)
+        index = self.index
+        return [index(point) for point in points]
+
+    def histogram(self, points):
+        """Returns the number of points in each bucket, as a list or for NumPy arrays an array"""
+        if hasattr(points, 'dtype'):
+            index = self._array(points)
+            return _numpy().bincount(index[index >= 0], minlength=len(self))
+        counts = [0] * len(self)
+        for index in self.assign(points):
+            if index >= 0:
+                counts[index] += 1
+        return counts
@@ -1,12 +1,18 @@
 import re
 import time
-import pytz
 from copy import copy
 from datetime import datetime, timedelta
 
+from timestring import cache
+from timestring import dispatch
+from timestring import timezones
+from timestring import instrument
 from timestring.text2num import text2num
+from timestring.Delta import Delta
+from timestring.Duration import Duration
 from timestring import TimestringInvalid
-from timestring.timestring_re import TIMESTRING_RE
+from timestring import timestring_re
+from timestring.timestring_re import LazyPattern
 
 try:
     unicode
@@ -14,10 +20,67 @@ except NameError:
     unicode = str
     long = int
 
-CLEAN_NUMBER = re.compile(r"[\D]")
+CLEAN_NUMBER = LazyPattern(r"[\D]")
+
+EPOCH = datetime(1970, 1, 1)
+INFINITY = float('inf')
+
+
+def epoch_us(date):
+    """Returns microseconds since the unix epoch for a <datetime>
+
+    Naive datetimes are taken as UTC. Aware datetimes are read as wall clock
+    time in their zone, pytz zones attached by `replace` carry their LMT offset
+    so the wall clock is localized instead. zoneinfo zones are used as is.
+    """
+    tz = date.tzinfo
+    if tz is not None:
+        date = date.replace(tzinfo=None)
+        offset = tz.localize(date).utcoffset() if hasattr(tz, 'localize') else tz.utcoffset(date)
+        date = date - offset
+    delta = date - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _today(tz=None, now=None):
+    """Returns midnight of the current day, as observed in `tz` when provided
+
+    `now` is the local reference time, `datetime.now()` by default.
+    """
+    if now is None:
+        now = datetime.now()
+    new_date = datetime(now.year, now.month, now.day)
+    if tz and timezones.name(tz) != "UTC":
+        #
+        # The purpose here is to adjust what day it is based on the timezeone
+        #
+        ts = now + timezones.utcoffset(tz, new_date, now)
+        new_date = datetime(ts.year, ts.month, ts.day)
+    return new_date
+
+
+def _stamp(granularity, tz=None, now=None):
+    """Returns the parse cache stamp for results that go stale every `granularity`"""
+    if granularity is None:
+        return None
+    if tz and not hasattr(tz, 'utcoffset'):
+        tz = timezones.resolve(tz)
+    if now is None:
+        now = datetime.now()
+    if granularity == 'day':
+        return _today(tz, now)
+    return (_today(tz, now), now.hour) if granularity == 'hour' else (_today(tz, now), now.hour, now.minute)
 
 class Date(object):
-    def __init__(self, date, offset=None, start_of_week=None, tz=None, verbose=False):
+    # which dispatch tier resolved the input, see `timestring.dispatch.TIERS`
+    _tier = None
+    # the `date` the cached ordering key was computed from
+    _keyed = None
+
+    def __init__(self, date, offset=None, start_of_week=None, tz=None, verbose=False, now=None):
+        """`now` is the local reference time relative dates resolve against,
+        pass the same one to keep a batch of parses consistent
+        """
         if isinstance(date, Date):
             self.date = copy(date.date)
             return
@@ -25,28 +88,54 @@ class Date(object):
         # The original request
         self._original = date
         if tz:
-            tz = pytz.timezone(str(tz))
+            tz = timezones.resolve(tz)
+
+        key = None
+        if cache.CACHE is not None and type(date) in (str, unicode) and not verbose:
+            granularity = cache.granularity(date)
+            if granularity is not False:
+                key = cache.make_key('Date', date, tz, offset, start_of_week)
+                if now is None:
+                    now = datetime.now()
+                stamp = _stamp(granularity, tz, now)
+                hit = cache.CACHE.get(key, stamp)
+                if hit is not cache.MISS:
+                    self.date = hit
+                    self._tier = 'cache'
+                    return
+
+        # Machine formats are resolved without running TIMESTRING_RE
+        if type(date) in (str, unicode):
+            self._tier, fast, has_time = dispatch.fast_parse(date)
+        else:
+            fast = None
 
         if date == 'infinity':
             self.date = 'infinity'
 
         elif date == 'now':
-            self.date = datetime.now()
+            self.date = now or datetime.now()
 
-        elif type(date) in (str, unicode) and re.match(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+-\d{2}", date):
-            self.date = datetime.strptime(date[:-3], "%Y-%m-%d %H:%M:%S.%f") - timedelta(hours=int(date[-3:]))
+        elif self._tier == 'pg':
+            self.date = fast
 
         else:
+            if fast is not None:
+                date = fast
+                if has_time:
+                    # No offset because the hour was set.
+                    offset = False
+
             # Determinal starting date.
             if type(date) in (str, unicode):
                 """The date is a string and needs to be converted into a <dict> for processesing
                 """
                 _date = date.lower()
-                res = TIMESTRING_RE.search(_date.strip())
+                res = timestring_re.PATTERN.search(_date.strip())
                 if res:
                     date = res.groupdict()
                     if verbose:
-                        print("Matches:\n", ''.join(["\t%s: %s\n" % (k, v) for k, v in date.items() if v]))
+                        instrument.trace('match', kind='Date', text=_date, groups=dict((k, v) for k, v in date.items() if v))
                 else:
                     raise TimestringInvalid('Invalid date string >> %s' % date)
 
@@ -55,20 +144,9 @@ class Date(object):
 
             if isinstance(date, dict):
                 # Initial date.
-                new_date = datetime(*time.localtime()[:3])
-                if tz and tz.zone != "UTC":
-                    #
-                    # The purpose here is to adjust what day it is based on the timezeone
-                    #
-                    ts = datetime.now()
-                    # Daylight savings === second Sunday in March and reverts to standard time on the first Sunday in November
-                    # Monday is 0 and Sunday is 6.
-                    # 14 days - dst_start.weekday()
-                    dst_start = datetime(ts.year, 3, 1, 2, 0, 0) + timedelta(13 - datetime(ts.year, 3, 1).weekday())
-                    dst_end = datetime(ts.year, 11, 1, 2, 0, 0) + timedelta(6 - datetime(ts.year, 11, 1).weekday())
-
-                    ts = ts + tz.utcoffset(new_date, is_dst=(dst_start < ts < dst_end))
-                    new_date = datetime(ts.year, ts.month, ts.day)
+                if now is None:
+                    now = datetime.now()
+                new_date = _today(tz, now)
 
                 if date.get('unixtime'):
                     new_date = datetime.fromtimestamp(int(date.get('unixtime')))
@@ -166,8 +244,7 @@ class Date(object):
                 # !daytime
                 if date.get('daytime'):
                     if date['daytime'].find('this time') >= 1:
-                        new_date = new_date.replace(hour=datetime(*time.localtime()[:5]).hour,
-                                                    minute=datetime(*time.localtime()[:5]).minute)
+                        new_date = new_date.replace(hour=now.hour, minute=now.minute)
                     else:
                         new_date = new_date.replace(hour=dict(morning=9, noon=12, afternoon=15, evening=18, night=21, nighttime=21, midnight=24).get(date.get('daytime'), 12))
                     # No offset because the hour was set.
@@ -204,11 +281,12 @@ class Date(object):
                 self.date = date
 
             elif date is None:
-                self.date = datetime.now()
+                self.date = now or datetime.now()
 
             else:
                 # Set to the current date Y, M, D, H0, M0, S0
-                self.date = datetime(*time.localtime()[:3])
+                now = now or datetime.now()
+                self.date = datetime(now.year, now.month, now.day)
 
             if tz:
                 self.date = self.date.replace(tzinfo=tz)
@@ -217,9 +295,17 @@ class Date(object):
             if offset and isinstance(offset, dict):
                 self.date = self.date.replace(**offset)
 
+        if key is not None:
+            cache.CACHE.put(key, self.date, stamp)
+
     def __repr__(self):
         return "<timestring.Date %s %s>" % (str(self), id(self))
 
+    @property
+    def tier(self):
+        """Name of the dispatch tier that resolved this date, or `cache` when memoized"""
+        return self._tier
+
     @property
     def year(self):
         if self.date != 'infinity':
@@ -290,7 +376,7 @@ class Date(object):
             if tz is None:
                 self.date = self.date.replace(tzinfo=None)
             else:
-                self.date = self.date.replace(tzinfo=pytz.timezone(tz))
+                self.date = self.date.replace(tzinfo=timezones.resolve(tz))
 
     def replace(self, **k):
         """Note returns a new Date obj"""
@@ -305,47 +391,22 @@ class Date(object):
         **Will change this object**
 
         return new copy of self
+
+        `to` is a `Delta`, a string like '1 day' parsed once into one,
+        a `Duration` or seconds
         '''
         if self.date == 'infinity':
             return
         new = copy(self)
         if type(to) in (str, unicode):
-            to = to.lower()
-            res = TIMESTRING_RE.search(to)
-            if res:
-                rgroup = res.groupdict()
-                if (rgroup.get('delta') or rgroup.get('delta_2')):
-                    i = int(text2num(rgroup.get('num', 'one'))) * (-1 if to.startswith('-') else 1)
-                    delta = (rgroup.get('delta') or rgroup.get('delta_2')).lower()
-                    if delta.startswith('y'):
-                        try:
-                            new.date = new.date.replace(year=(new.date.year + i))
-                        except ValueError:
-                            # day is out of range for month
-                            new.date = new.date + timedelta(days=(365 * i))
-                    elif delta.startswith('month'):
-                        if (new.date.month + i) > 12:
-                            new.date = new.date.replace(month=(i - (i / 12)),
-                                                        year=(new.date.year + 1 + (i / 12)))
-                        elif (new.date.month + i) < 1:
-                            new.date = new.date.replace(month=12, year=(new.date.year - 1))
-                        else:
-                            new.date = new.date.replace(month=(new.date.month + i))
-                    elif delta.startswith('q'):
-                        # NP
-                        pass
-                    elif delta.startswith('w'):
-                        new.date = new.date + timedelta(days=(7 * i))
-                    elif delta.startswith('s'):
-                        new.date = new.date + timedelta(seconds=i)
-                    else:
-                        new.date = new.date + timedelta(**{('days' if delta.startswith('d') else 'hours' if delta.startswith('h') else 'minutes' if delta.startswith('m') else 'seconds'): i})
-                    return new
+            to = Delta.parse(to)
+        if isinstance(to, Delta):
+            new.date = to.apply(new.date)
+        elif isinstance(to, Duration):
+            new.date = new.date + to.timedelta
         else:
             new.date = new.date + timedelta(seconds=int(to))
-            return new
-
-        raise TimestringInvalid('Invalid addition request')
+        return new
 
     def __nonzero__(self):
         return True
@@ -360,7 +421,7 @@ class Date(object):
             return copy(self)
         if type(to) in (str, unicode):
             to = to[1:] if to.startswith('-') else ('-'+to)
-        elif type(to) in (int, float, long):
+        elif type(to) in (int, float, long) or isinstance(to, (Delta, Duration)):
             to = to * -1
         return copy(self).adjust(to)
 
@@ -374,7 +435,40 @@ class Date(object):
         """Returns date in representation of `%x %X` ie `2013-02-17 00:00:00`"""
         return str(self.date)
 
+    def _keys(self):
+        """Returns the ordering key and whether the date is naive (None for infinity),
+        recomputed only when `self.date` has been replaced"""
+        date = self.date
+        if self._keyed is not date:
+            if date == 'infinity':
+                self._ordering = (INFINITY, None)
+            else:
+                self._ordering = (epoch_us(date), date.tzinfo is None)
+            self._keyed = date
+        return self._ordering
+
+    @property
+    def key(self):
+        """Ordering key in epoch microseconds, see `epoch_us`. 'infinity' is +inf"""
+        return self._keys()[0]
+
+    def _comparable(self, other):
+        """Returns both keys when `other` is a Date that orders by key alone,
+        ie. unless one side is naive and the other aware"""
+        (key, naive), (other_key, other_naive) = self._keys(), other._keys()
+        if naive is None or other_naive is None or naive == other_naive:
+            return key, other_key
+
+    def __hash__(self):
+        # a naive date equals an aware one on the wall clock but is keyed as UTC,
+        # so the two only hash alike in UTC
+        return hash(self.key)
+
     def __gt__(self, other):
+        if isinstance(other, Date):
+            keys = self._comparable(other)
+            if keys:
+                return keys[0] > keys[1]
         if self.date == 'infinity':
             if isinstance(other, Date):
                 return other.date != 'infinity'
@@ -406,6 +500,10 @@ class Date(object):
                     return self.__gt__(Date(other, tz=self.tz))
 
     def __lt__(self, other):
+        if isinstance(other, Date):
+            keys = self._comparable(other)
+            if keys:
+                return keys[0] < keys[1]
         if self.date == 'infinity':
             # infinity can never by less then a date
             return False
@@ -430,15 +528,33 @@ class Date(object):
                 return self.__lt__(Date(other, tz=self.tz))
 
     def __ge__(self, other):
+        if isinstance(other, Date):
+            keys = self._comparable(other)
+            if keys:
+                return keys[0] >= keys[1]
+            # one side naive, compared on the wall clock
+            return not self < other
         return self > other or self == other
 
     def __le__(self, other):
+        if isinstance(other, Date):
+            keys = self._comparable(other)
+            if keys:
+                return keys[0] <= keys[1]
+            return not self > other
         return self < other or self == other
 
     def __eq__(self, other):
         if isinstance(other, datetime):
             other = Date(other)
+        elif not isinstance(other, Date):
+            from .compact import CompactDate
+            if isinstance(other, CompactDate):
+                other = other.to_date()
         if isinstance(other, Date):
+            keys = self._comparable(other)
+            if keys:
+                return keys[0] == keys[1]
             if other.date == 'infinity':
                 return self.date == 'infinity'
 
@@ -0,0 +1,184 @@
+from datetime import timedelta
+
+from timestring import TimestringInvalid
+from timestring.text2num import text2num, NumberException
+from timestring import timestring_re
+
+try:
+    unicode
+except NameError:
+    unicode = str
+    long = int
+
+
+FIELDS = ('years', 'quarters', 'months', 'weeks', 'days', 'hours', 'minutes', 'seconds')
+
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# parsed string deltas, cleared when full
+INTERN_SIZE = 4096
+_INTERNED = {}
+
+
+def days_in_month(year, month):
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return DAYS_IN_MONTH[month - 1]
+
+
+def add_months(date, months):
+    """Adds calendar months, clamping the day to the length of the target month"""
+    year, month = divmod(date.month - 1 + months, 12)
+    year += date.year
+    return date.replace(year=year, month=month + 1, day=min(date.day, days_in_month(year, month + 1)))
+
+
+def _unit(delta):
+    if delta.startswith('y'):
+        return 'years'
+    elif delta.startswith('month'):
+        return 'months'
+    elif delta.startswith('q'):
+        return 'quarters'
+    elif delta.startswith('w'):
+        return 'weeks'
+    elif delta.startswith('s'):
+        return 'seconds'
+    elif delta.startswith('d'):
+        return 'days'
+    elif delta.startswith('h'):
+        return 'hours'
+    return 'minutes'
+
+
+class Delta(object):
+    """An offset of calendar months and an exact timedelta
+
+    >>> str(Date('jan 31st 2014') + Delta(months=1))
+    '2014-02-28 00:00:00'
+    >>> Delta.parse('2 weeks') + Delta(days=1)
+    <timestring.Delta 2 weeks 1 day>
+
+    Years, quarters and months move the calendar, clamping the day on
+    shorter months, the rest is added as a timedelta.
+    """
+    def __init__(self, years=0, quarters=0, months=0, weeks=0, days=0, hours=0, minutes=0, seconds=0):
+        self.years = years
+        self.quarters = quarters
+        self.months = months
+        self.weeks = weeks
+        self.days = days
+        self.hours = hours
+        self.minutes = minutes
+        self.seconds = seconds
+        # normalized once, `apply` only uses these
+        self._months = years * 12 + quarters * 3 + months
+        self._delta = timedelta(weeks=weeks, days=days, hours=hours, minutes=minutes, seconds=seconds)
+
+    @classmethod
+    def parse(cls, text):
+        """Returns the Delta of a string like '1 day', '-3 months' or 'two weeks'.
+        Each distinct string is parsed once and the same Delta returned after.
+        """
+        if isinstance(text, Delta):
+            return text
+        delta = _INTERNED.get(text)
+        if delta is None:
+            delta = cls._parse(text)
+            if len(_INTERNED) >= INTERN_SIZE:
+                _INTERNED.clear()
+            _INTERNED[text] = delta
+        return delta
+
+    @classmethod
+    def _parse(cls, text):
+        text = text.lower().strip()
+        res = timestring_re.PATTERN.search(text)
+        if res:
+            rgroup = res.groupdict()
+            unit = rgroup.get('delta') or rgroup.get('delta_2')
+            if unit:
+                num = (rgroup.get('num') or '').strip()
+                if not num:
+                    i = 1
+                elif num.find('couple') > -1:
+                    i = 2
+                else:
+                    try:
+                        i = int(text2num(num))
+                    except NumberException:
+                        raise TimestringInvalid('Invalid addition request')
+                return cls(**{_unit(unit): -i if text.startswith('-') else i})
+        raise TimestringInvalid('Invalid addition request')
+
+    @classmethod
+    def from_timedelta(cls, delta):
+        return cls(days=delta.days, seconds=delta.seconds + delta.microseconds / 1000000.0)
+
+    def apply(self, date, times=1):
+        """Returns the datetime `date` moved by this delta `times` times"""
+        if self._months:
+            date = add_months(date, self._months * times)
+        if self._delta:
+            date = date + self._delta * times
+        return date
+
+    @property
+    def timedelta(self):
+        """The exact part, everything below months"""
+        return self._delta
+
+    @property
+    def total_months(self):
+        """The calendar part, years and quarters counted in months"""
+        return self._months
+
+    def _fields(self):
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def __add__(self, other):
+        if not isinstance(other, Delta):
+            other = Delta.parse(other)
+        return Delta(*[a + b for a, b in zip(self._fields(), other._fields())])
+
+    def __sub__(self, other):
+        if not isinstance(other, Delta):
+            other = Delta.parse(other)
+        return self + -other
+
+    def __neg__(self):
+        return Delta(*[-value for value in self._fields()])
+
+    def __mul__(self, times):
+        return Delta(*[value * times for value in self._fields()])
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        if isinstance(other, (str, unicode)):
+            other = Delta.parse(other)
+        if isinstance(other, Delta):
+            return self._months == other._months and self._delta == other._delta
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __hash__(self):
+        return hash((self._months, self._delta))
+
+    def __nonzero__(self):
+        return bool(self._months or self._delta)
+
+    __bool__ = __nonzero__
+
+    def __str__(self):
+        parts = []
+        for field, value in zip(FIELDS, self._fields()):
+            if value:
+                parts.append("%s %s" % (value, field if abs(value) != 1 else field[:-1]))
+        return " ".join(parts) or "0 seconds"
+
+    def __repr__(self):
+        return "<timestring.Delta %s>" % self
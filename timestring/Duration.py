@@ -0,0 +1,183 @@
+from datetime import timedelta
+
+from timestring import TimestringInvalid
+
+try:
+    long
+except NameError:
+    long = int
+
+
+UNITS = ('years', 'months', 'days', 'hours', 'minutes', 'seconds')
+SHORT = ('y', 'm', 'd', 'h', 'm', 's')
+
+# microseconds in each unit, years and months are 365 and 30 days
+SIZES = (365 * 86400000000, 30 * 86400000000, 86400000000, 3600000000, 60000000, 1000000)
+
+
+def _parts(microseconds):
+    rest, parts = abs(microseconds), []
+    for size in SIZES:
+        value, rest = divmod(rest, size)
+        parts.append(int(value))
+    if microseconds < 0:
+        parts = [-value for value in parts]
+    return tuple(parts)
+
+
+class Duration(object):
+    """An exact length of time in microseconds
+
+    >>> duration = Range('2014-01-01', '2015-02-03 06:00').duration
+    >>> duration.total_seconds()
+    34408800.0
+    >>> duration.parts
+    (1, 1, 3, 6, 0, 0)
+    >>> str(duration)
+    '1 year 1 month 3 days 6 hours'
+
+    `parts` splits it into years of 365 days and months of 30 days, both
+    computed on first use and kept, as is each formatting.
+    """
+    __slots__ = ('microseconds', '_parts', '_formats')
+
+    def __init__(self, microseconds=0):
+        self.microseconds = microseconds
+        self._parts = None
+        self._formats = None
+
+    @classmethod
+    def from_timedelta(cls, delta):
+        return cls(delta.days * 86400000000 + delta.seconds * 1000000 + delta.microseconds)
+
+    @property
+    def timedelta(self):
+        return timedelta(microseconds=self.microseconds)
+
+    def total_seconds(self):
+        return self.microseconds / 1000000.0
+
+    @property
+    def parts(self):
+        """(years, months, days, hours, minutes, seconds), negative durations have negative parts"""
+        if self._parts is None:
+            self._parts = _parts(self.microseconds)
+        return self._parts
+
+    def format(self, short=False, min=None, round=None):
+        """Returns the non zero parts, like '3 days 6 hours' or '3d 6h' when `short`
+
+        `round` rounds to that unit, halves away from zero, so 12 hours
+        rounded to days is a day. `min` drops that unit and the smaller ones.
+        """
+        key = (short, min, round)
+        formats = self._formats
+        if formats is None:
+            formats = self._formats = {}
+        text = formats.get(key)
+        if text is None:
+            text = formats[key] = self._format(short, min, round)
+        return text
+
+    def _format(self, short, min, round):
+        parts = list(self.parts)
+        if round:
+            if round not in UNITS[:-1]:
+                raise TimestringInvalid("Cannot round to %r, must be one of %s" % (round, ", ".join(UNITS[:-1])))
+            index = UNITS.index(round)
+            size = SIZES[index]
+            total = abs(self.microseconds)
+            # what the smaller units hold, years are not a whole number of months
+            rest = sum(abs(value) * unit for value, unit in zip(parts[index + 1:], SIZES[index + 1:]))
+            rest += total % SIZES[-1]
+            total += size - rest if rest * 2 >= size else -rest
+            # carried up, 29 days 13 hours to days is a month
+            parts = list(_parts(-total if self.microseconds < 0 else total))
+            min = UNITS[index + 1]
+        if min:
+            if min not in UNITS:
+                raise TimestringInvalid("Cannot drop %r, must be one of %s" % (min, ", ".join(UNITS)))
+            for index in range(UNITS.index(min), len(UNITS)):
+                parts[index] = 0
+        text = []
+        for unit, abbreviation, value in zip(UNITS, SHORT, parts):
+            if value:
+                if short:
+                    text.append("%d%s" % (value, abbreviation))
+                else:
+                    text.append("%d %s" % (value, unit if abs(value) != 1 else unit[:-1]))
+        return " ".join(text) or ("0s" if short else "0 seconds")
+
+    def __add__(self, other):
+        if isinstance(other, timedelta):
+            other = Duration.from_timedelta(other)
+        if isinstance(other, Duration):
+            return Duration(self.microseconds + other.microseconds)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, timedelta):
+            other = Duration.from_timedelta(other)
+        if isinstance(other, Duration):
+            return Duration(self.microseconds - other.microseconds)
+        return NotImplemented
+
+    def __neg__(self):
+        return Duration(-self.microseconds)
+
+    def __abs__(self):
+        return Duration(abs(self.microseconds))
+
+    def __mul__(self, times):
+        if isinstance(times, (int, long, float)):
+            return Duration(int(self.microseconds * times))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def _other(self, other):
+        if isinstance(other, Duration):
+            return other.microseconds
+        if isinstance(other, timedelta):
+            return Duration.from_timedelta(other).microseconds
+
+    def __eq__(self, other):
+        other = self._other(other)
+        return NotImplemented if other is None else self.microseconds == other
+
+    def __ne__(self, other):
+        other = self._other(other)
+        return NotImplemented if other is None else self.microseconds != other
+
+    def __lt__(self, other):
+        other = self._other(other)
+        return NotImplemented if other is None else self.microseconds < other
+
+    def __le__(self, other):
+        other = self._other(other)
+        return NotImplemented if other is None else self.microseconds <= other
+
+    def __gt__(self, other):
+        other = self._other(other)
+        return NotImplemented if other is None else self.microseconds > other
+
+    def __ge__(self, other):
+        other = self._other(other)
+        return NotImplemented if other is None else self.microseconds >= other
+
+    def __hash__(self):
+        # equal timedeltas hash the same
+        return hash(self.timedelta)
+
+    def __nonzero__(self):
+        return bool(self.microseconds)
+
+    __bool__ = __nonzero__
+
+    def __str__(self):
+        return self.format()
+
+    def __repr__(self):
+        return "<timestring.Duration %s>" % self
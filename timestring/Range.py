@@ -1,11 +1,15 @@
 import re
-import pytz
 from copy import copy
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from timestring.Date import Date
+from timestring import cache
+from timestring import dispatch
+from timestring import instrument
+from timestring.Date import Date, INFINITY, _stamp
 from timestring import TimestringInvalid
-from timestring.timestring_re import TIMESTRING_RE
+from timestring.Delta import Delta
+from timestring.Duration import Duration
+from timestring import timestring_re
 
 try:
     unicode
@@ -14,9 +18,36 @@ except NameError:
     long = int
 
 
+def _step(step):
+    """Returns `step` as a positive Delta
+
+    >>> _step('2 weeks')
+    <timestring.Delta 2 weeks>
+    """
+    if isinstance(step, Duration):
+        step = step.timedelta
+    if isinstance(step, timedelta):
+        step = Delta.from_timedelta(step)
+    elif isinstance(step, (int, long, float)):
+        step = Delta(seconds=step)
+    else:
+        step = Delta.parse(step if isinstance(step, Delta) else str(step))
+    if step.total_months < 0 or step.timedelta < timedelta(0) or not step:
+        raise TimestringInvalid("Step must be positive, got %r" % step)
+    return step
+
+
 class Range(object):
-    def __init__(self, start, end=None, offset=None, start_of_week=0, tz=None, verbose=False):
+    # which dispatch tier resolved the input, see `timestring.dispatch.TIERS`
+    _tier = None
+    # (start datetime, end datetime, Duration) of the last `duration`
+    _measured = None
+
+    def __init__(self, start, end=None, offset=None, start_of_week=0, tz=None, verbose=False, now=None):
         """`start` can be type <class timestring.Date> or <type str>
+
+        `now` is the local reference time, read once and shared by every
+        Date resolved for this range
         """
         self._dates = []
         pgoffset = None
@@ -26,17 +57,32 @@ class Range(object):
 
         if not isinstance(start, (Date, datetime)):
             start = str(start)
+            if now is None:
+                now = datetime.now()
         if end and not isinstance(end, (Date, datetime)):
             end = str(end)
 
+        key = None
+        if cache.CACHE is not None and not end and not isinstance(start, (Date, datetime)) and not verbose:
+            granularity = cache.granularity(start)
+            if granularity is not False:
+                key = cache.make_key('Range', start, tz, offset, start_of_week)
+                stamp = _stamp(granularity, tz, now)
+                hit = cache.CACHE.get(key, stamp)
+                if hit is not cache.MISS:
+                    self._dates = (Date(hit[0]), Date(hit[1]))
+                    self._tier = 'cache'
+                    return
+
         if start and end:
             """start and end provided
             """
-            self._dates = (Date(start, tz=tz), Date(end, tz=tz))
+            self._dates = (Date(start, tz=tz, now=now), Date(end, tz=tz, now=now))
 
         elif start == 'infinity':
             # end was not provided
             self._dates = (Date('infinity'), Date('infinity'))
+            self._tier = 'literal'
 
         elif re.search(r'(\s(and|to)\s)', start):
             """Both sides where provided in the start
@@ -44,37 +90,40 @@ class Range(object):
             start = re.sub('^(between|from)\s', '', start.lower())
             # Both arguments found in start variable
             r = tuple(re.split(r'(\s(and|to)\s)', start.strip()))
-            self._dates = (Date(r[0], tz=tz), Date(r[-1], tz=tz))
+            self._dates = (Date(r[0], tz=tz, now=now), Date(r[-1], tz=tz, now=now))
+            self._tier = 'regex'
 
         elif re.match(r"(\[|\()((\"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d+)?(\+|\-)\d{2}\")|infinity),((\"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d+)?(\+|\-)\d{2}\")|infinity)(\]|\))", start):
             """postgresql tsrange and tstzranges support
             """
             start, end = tuple(re.sub('[^\w\s\-\:\.\+\,]', '', start).split(','))
-            self._dates = (Date(start), Date(end))
+            self._dates = (Date(start, now=now), Date(end, now=now))
+            self._tier = 'pg'
 
         else:
-            now = datetime.now()
             # no tz info but offset provided, we are UTC so convert
 
             if re.search(r"(\+|\-)\d{2}$", start):
                 # postgresql tsrange and tstzranges
                 pgoffset = re.search(r"(\+|\-)\d{2}$", start).group() + " hours"
 
-            # tz info provided
-            if tz:
-                now = now.replace(tzinfo=pytz.timezone(str(tz)))
+            # Parse, machine formats skip TIMESTRING_RE
+            self._tier = dispatch.classify(start)
+            res = timestring_re.PATTERN.search(start) if self._tier == 'regex' else None
+            if self._tier != 'regex':
+                # a single instant, so the range spans the following day
+                start = Date(start, offset=offset, tz=tz, now=now)
+                end = start + '1 day'
 
-            # Parse
-            res = TIMESTRING_RE.search(start)
-            if res:
+            elif res:
                 group = res.groupdict()
                 if verbose:
-                    print(dict(map(lambda a: (a, group.get(a)), filter(lambda a: group.get(a), group))))
+                    instrument.trace('match', kind='Range', text=start, groups=dict((k, v) for k, v in group.items() if v))
                 if (group.get('delta') or group.get('delta_2')) is not None:
                     delta = (group.get('delta') or group.get('delta_2')).lower()
 
                     # always start w/ today
-                    start = Date("today", offset=offset, tz=tz)
+                    start = Date("today", offset=offset, tz=tz, now=now)
 
                     # make delta
                     di = "%s %s" % (str(int(group['num'] or 1)), delta)
@@ -83,27 +132,27 @@ class Range(object):
                     if group['ref'] == 'this':
 
                         if delta.startswith('y'):
-                            start = Date(datetime(now.year, 1, 1), offset=offset, tz=tz)
+                            start = Date(datetime(now.year, 1, 1), offset=offset, tz=tz, now=now)
 
                         # month
                         elif delta.startswith('month'):
-                            start = Date(datetime(now.year, now.month, 1), offset=offset, tz=tz)
+                            start = Date(datetime(now.year, now.month, 1), offset=offset, tz=tz, now=now)
 
                         # week
                         elif delta.startswith('w'):
-                            start = Date("today", offset=offset, tz=tz) - (str(Date("today", tz=tz).date.weekday())+' days')
+                            start = Date("today", offset=offset, tz=tz, now=now) - (str(Date("today", tz=tz, now=now).date.weekday())+' days')
 
                         # day
                         elif delta.startswith('d'):
-                            start = Date("today", offset=offset, tz=tz)
+                            start = Date("today", offset=offset, tz=tz, now=now)
 
                         # hour
                         elif delta.startswith('h'):
-                            start = Date("today", offset=dict(hour=now.hour+1), tz=tz)
+                            start = Date("today", offset=dict(hour=now.hour+1), tz=tz, now=now)
 
                         # minute, second
                         elif delta.startswith('m') or delta.startswith('s'):
-                            start = Date("now", tz=tz)
+                            start = Date("now", tz=tz, now=now)
 
                         else:
                             raise TimestringInvalid("Not a valid time reference")
@@ -126,24 +175,24 @@ class Range(object):
                     else:
                         # need to include today with this reference
                         if not (delta.startswith('h') or delta.startswith('m') or delta.startswith('s')):
-                            start = Range('today', offset=offset, tz=tz).end
+                            start = Range('today', offset=offset, tz=tz, now=now).end
                         end = start - di                    
 
                 elif group.get('month_1'):
                     # a single month of this yeear
-                    start = Date(start, offset=offset, tz=tz)
+                    start = Date(start, offset=offset, tz=tz, now=now)
                     start = start.replace(day=1)
                     end = start + '1 month'
 
                 elif group.get('year_5'):
                     # a whole year
-                    start = Date(start, offset=offset, tz=tz)
+                    start = Date(start, offset=offset, tz=tz, now=now)
                     start = start.replace(day=1, month=1)
                     end = start + '1 year'
 
                 else:
                     # after all else, we set the end to + 1 day
-                    start = Date(start, offset=offset, tz=tz)
+                    start = Date(start, offset=offset, tz=tz, now=now)
                     end = start + '1 day'
 
             else:
@@ -165,12 +214,21 @@ class Range(object):
 
             self._dates = (start, end)
 
-        if self._dates[0] > self._dates[1]:
+        # an infinite start is open towards the past, never after the end
+        if self._dates[0].date != 'infinity' and self._dates[0] > self._dates[1]:
             self._dates = (self._dates[0], self._dates[1] + '1 day')
 
+        if key is not None:
+            cache.CACHE.put(key, (self._dates[0].date, self._dates[1].date), stamp)
+
     def __repr__(self):
         return "<timestring.Range %s %s>" % (str(self), id(self))
 
+    @property
+    def tier(self):
+        """Name of the dispatch tier that resolved this range, or `cache` when memoized"""
+        return self._tier
+
     def __getitem__(self, index):
         return self._dates[index]
 
@@ -194,46 +252,28 @@ class Range(object):
         return self[1]
 
     @property
-    def elapse(self, short=False, format=True, min=None, round=None):
-        if self.start == 'infinity' or self.end == 'infinity':
-            return "infinity"
-        # years, months, days, hours, minutes, seconds
-        full = [0, 0, 0, 0, 0, 0]
-        elapse = self[1].date - self[0].date
-        days = elapse.days
-        if days > 365:
-            years = days / 365
-            full[0] = years
-            days = elapse.days - (years*365)
-        if days > 30:
-            months = days / 30
-            full[1] = months
-            days = days - (days / 30)
-
-        full[2] = days
-
-        full[3], full[4], full[5] = tuple(map(int, map(float, str(elapse).split(', ')[-1].split(':'))))
-
-        if round:
-            r = ['years', 'months', 'days', 'hours', 'minutes', 'seconds']
-            assert round in r[:-1], "round value is not allowed. Must be in "+",".join(r)
-            if full[r.index(round)+1] > dict(months=6, days=15, hours=12, minutes=30, seconds=30).get(r[r.index(round)+1]):
-                full[r.index(round)] += 1
-
-            min = r[r.index(round)+1]
-
-        if min:
-            m = ['years', 'months', 'days', 'hours', 'minutes', 'seconds']
-            assert min in m, "min value is not allowed. Must be in "+",".join(m)
-            for x in range(6-m.index(min)):
-                full[5-x] = 0
-
-        if format:
-            if short:
-                return re.sub('((?<!\d)0\w\s?)', '', "%dy %dm %dd %dh %dm %ss" % tuple(full))
-            else:
-                return re.sub('((?<!\d)0\s\w+\s?)', '', "%d years %d months %d days %d hours %d minutes %d seconds" % tuple(full))
-        return full
+    def duration(self):
+        """The Duration from start to end, None when either is infinite
+
+        >>> Range('2014-03-01', '2014-03-04 12:00').duration
+        <timestring.Duration 3 days 12 hours>
+        """
+        start, end = self._dates[0].date, self._dates[1].date
+        measured = self._measured
+        if measured is not None and measured[0] is start and measured[1] is end:
+            return measured[2]
+        if start == 'infinity' or end == 'infinity':
+            return None
+        duration = Duration.from_timedelta(end - start)
+        # kept with its formatting until either date is replaced
+        self._measured = (start, end, duration)
+        return duration
+
+    @property
+    def elapse(self):
+        """The duration as text, like '3 days 12 hours', see `Duration.format`"""
+        duration = self.duration
+        return "infinity" if duration is None else duration.format()
 
     @property
     def tz(self):
@@ -252,15 +292,69 @@ class Range(object):
         """
         return abs(int(self[1].to_unixtime() - self[0].to_unixtime()))
 
+    def _keys(self):
+        """Returns the (start, end) ordering key and whether the range is naive"""
+        (start, start_naive), (end, end_naive) = self._dates[0]._keys(), self._dates[1]._keys()
+        if start == INFINITY:
+            # open towards the past
+            start = -INFINITY
+        return (start, end), start_naive if end_naive is None else end_naive
+
+    @property
+    def key(self):
+        """Ordering key, the epoch microseconds of the start and end.
+        An infinite start is -inf and an infinite end +inf"""
+        return self._keys()[0]
+
+    def _comparable(self, other):
+        if not isinstance(other, Range):
+            from timestring.compact import CompactRange
+            if not isinstance(other, CompactRange):
+                return None
+        (key, naive), (other_key, other_naive) = self._keys(), other._keys()
+        if naive is None or other_naive is None or naive == other_naive:
+            return key, other_key
+
+    def __hash__(self):
+        return hash(self.key)
+
     def __lt__(self, other):
+        keys = self._comparable(other)
+        if keys:
+            return keys[0] < keys[1]
         return self.cmp(other) == -1
 
     def __gt__(self, other):
+        keys = self._comparable(other)
+        if keys:
+            return keys[0] > keys[1]
         return self.cmp(other) == 1
 
+    def __le__(self, other):
+        keys = self._comparable(other)
+        if keys:
+            return keys[0] <= keys[1]
+        return self.cmp(other) != 1
+
+    def __ge__(self, other):
+        keys = self._comparable(other)
+        if keys:
+            return keys[0] >= keys[1]
+        return self.cmp(other) != -1
+
     def __eq__(self, other):
+        keys = self._comparable(other)
+        if keys:
+            return keys[0] == keys[1]
+        from timestring.compact import CompactRange
+        if isinstance(other, CompactRange):
+            # of the other naivety, compared as a Range rather than through its text
+            other = other.to_range()
         return self.cmp(other) == 0
 
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
     def cmp(self, other):
         """*Note: checks Range.start() only*
         Key: self = [], other = {}
@@ -347,22 +441,73 @@ class Range(object):
 
     def adjust(self, to):
         # return a new instane, like datetime does
+        if type(to) in (str, unicode):
+            to = Delta.parse(to)
         return Range(self.start.adjust(to),
                      self.end.adjust(to), tz=self.start.tz)
 
+    def _finite(self):
+        if self.start == 'infinity' or self.end == 'infinity':
+            raise TimestringInvalid("Cannot step through an infinite range")
+        return self.start.date, self.end.date
+
+    def iter(self, step='1 day'):
+        """Yields consecutive ranges of `step` covering this range,
+        the last one cut at the end
+
+        >>> [str(day.start) for day in Range('2014-03-01 to 2014-03-04').iter('1 day')]
+        ['2014-03-01 00:00:00', '2014-03-02 00:00:00', '2014-03-03 00:00:00']
+
+        `step` is a Delta, timedelta, seconds or a string like '6 hours' or '1 month'.
+        Months, quarters and years are calendar steps from the start, the day
+        of month is clamped on shorter months.
+        """
+        start, end = self._finite()
+        step = _step(step)
+        lo, index = start, 1
+        while lo < end:
+            hi = min(step.apply(start, index), end)
+            yield Range(lo, hi)
+            lo, index = hi, index + 1
+
+    def buckets(self, step='1 day'):
+        """Returns the calendar Buckets of `step` covering this range, to assign many points to
+
+        >>> Range('last 90 days').buckets('week').histogram(events)
+        [112, 98, ...]
+        """
+        from timestring.Buckets import Buckets
+        return Buckets(self, step)
+
+    def split(self, n):
+        """Yields `n` consecutive ranges of equal length covering this range
+
+        >>> [str(half.start) for half in Range('2014-03-01 to 2014-03-03').split(2)]
+        ['2014-03-01 00:00:00', '2014-03-02 00:00:00']
+        """
+        start, end = self._finite()
+        if n < 1:
+            raise TimestringInvalid("Cannot split a range into %r parts" % n)
+        delta = (end - start) / n
+        lo = start
+        for index in range(1, n + 1):
+            hi = end if index == n else start + delta * index
+            yield Range(lo, hi)
+            lo = hi
+
     def next(self, times=1):
-        """Returns a new instance of self
-        times is not supported yet.
+        """Returns the range of the same length `times` lengths after this one
         """
-        return Range(copy(self.end),
-                     self.end + self.elapse, tz=self.start.tz)
+        start, end = self._finite()
+        length = end - start
+        return Range(end + length * (times - 1), end + length * times)
 
     def prev(self, times=1):
-        """Returns a new instance of self
-        times is not supported yet.
+        """Returns the range of the same length `times` lengths before this one
         """
-        return Range(self.start - self.elapse,
-                     copy(self.start), tz=self.start.tz)
+        start, end = self._finite()
+        length = end - start
+        return Range(start - length * times, start - length * (times - 1))
 
     def __add__(self, to):
         return self.adjust(to)
@@ -370,6 +515,6 @@ class Range(object):
     def __sub__(self, to):
         if type(to) in (str, unicode):
             to = to[1:] if to.startswith('-') else ('-'+to)
-        elif type(to) in (int, long, float):
+        elif type(to) in (int, long, float) or isinstance(to, (Delta, Duration)):
             to = to * -1
         return self.adjust(to)
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+from timestring.Date import Date, EPOCH
+from timestring.Range import Range
+from timestring import timezones
+from timestring.vectorized import _numpy, _bound, INFINITY_US, NEG_INFINITY_US
+
+
+def _to_datetime(value, tz, infinity):
+    if value == infinity:
+        return 'infinity'
+    date = EPOCH + timedelta(microseconds=int(value))
+    if tz is not None:
+        return date.replace(tzinfo=timezones.utc()).astimezone(tz)
+    return date
+
+
+class RangeArray(object):
+    """Many ranges stored as two int64 arrays of epoch microseconds
+
+    >>> starts, ends, valid = timestring.parse_range_many(column)
+    >>> ranges = RangeArray(starts[valid], ends[valid])
+    >>> ranges.contains(events)
+    array([ True, False, ...])
+
+    Bounds are UTC, `tz` only tags the zone `Range` views are shown in.
+    Infinite bounds are the int64 extremes, see `timestring.vectorized`.
+    """
+    def __init__(self, starts, ends, tz=None):
+        numpy = _numpy()
+        self._starts = self._as_us(numpy.asarray(starts))
+        self._ends = self._as_us(numpy.asarray(ends))
+        if self._starts.shape != self._ends.shape or self._starts.ndim != 1:
+            raise ValueError("starts and ends must be one dimensional and of the same length")
+        if tz is not None and not hasattr(tz, 'utcoffset'):
+            tz = timezones.resolve(tz)
+        self.tz = tz
+
+    @staticmethod
+    def _as_us(values):
+        if values.dtype.kind == 'M':
+            return values.astype('datetime64[us]', copy=False).view('int64')
+        return values.astype('int64', copy=False)
+
+    @classmethod
+    def from_ranges(cls, ranges, tz=None):
+        numpy = _numpy()
+        bounds = [(_bound(_range.start, NEG_INFINITY_US), _bound(_range.end, INFINITY_US)) for _range in ranges]
+        bounds = numpy.array(bounds, dtype='int64').reshape(-1, 2)
+        return cls(bounds[:, 0], bounds[:, 1], tz=tz)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __repr__(self):
+        return "<timestring.RangeArray %d ranges %s>" % (len(self), id(self))
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, _numpy().integer)):
+            return Range(_to_datetime(self._starts[index], self.tz, NEG_INFINITY_US),
+                         _to_datetime(self._ends[index], self.tz, INFINITY_US))
+        return RangeArray(self._starts[index], self._ends[index], tz=self.tz)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def starts(self):
+        return self._starts.view('datetime64[us]')
+
+    @property
+    def ends(self):
+        return self._ends.view('datetime64[us]')
+
+    def _points(self, points):
+        numpy = _numpy()
+        if isinstance(points, (Date, datetime, str)):
+            date = points if isinstance(points, Date) else Date(points)
+            return _bound(date, INFINITY_US)
+        return self._as_us(numpy.asarray(points))
+
+    def contains(self, points):
+        """Returns whether each range contains the point at the same position, or a single point"""
+        points = self._points(points)
+        return (self._starts <= points) & (points <= self._ends)
+
+    def overlaps(self, other):
+        """Returns whether each range shares an instant with `other`, a Range or a RangeArray of the same length"""
+        if isinstance(other, Range):
+            other = RangeArray.from_ranges([other])
+        return (self._starts <= other._ends) & (other._starts <= self._ends)
+
+    def duration(self):
+        """Returns the length of each range as timedelta64[us], NaT when a bound is infinite"""
+        numpy = _numpy()
+        finite = (self._starts != NEG_INFINITY_US) & (self._ends != INFINITY_US)
+        durations = numpy.where(finite, self._ends - numpy.where(finite, self._starts, 0), numpy.iinfo('int64').min)
+        return durations.view('timedelta64[us]')
+
+    def shift(self, delta):
+        """Returns a new RangeArray moved by a timedelta, timedelta64 or integer microseconds"""
+        numpy = _numpy()
+        if isinstance(delta, timedelta):
+            delta = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+        elif isinstance(delta, numpy.timedelta64):
+            delta = int(delta.astype('timedelta64[us]').astype('int64'))
+        starts = numpy.where(self._starts == NEG_INFINITY_US, self._starts, self._starts + delta)
+        ends = numpy.where(self._ends == INFINITY_US, self._ends, self._ends + delta)
+        return RangeArray(starts, ends, tz=self.tz)
+
+    def argsort(self):
+        """Indices that order the ranges by start, then end"""
+        return _numpy().lexsort((self._ends, self._starts))
+
+    def sort(self):
+        """Orders the ranges by start, then end, in place"""
+        order = self.argsort()
+        self._starts = self._starts[order]
+        self._ends = self._ends[order]
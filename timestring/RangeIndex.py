@@ -0,0 +1,250 @@
+from datetime import datetime
+
+from timestring.Date import Date, INFINITY
+from timestring.Range import Range
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+def point(date):
+    """Returns the epoch microsecond key of a Date, 'infinity' is +inf"""
+    if not isinstance(date, Date):
+        date = Date(date)
+    return date.key
+
+
+def bounds(_range):
+    """Returns the epoch microsecond keys of a Range.
+
+    An infinite start is -inf (open towards the past) and an infinite end +inf.
+    """
+    if not isinstance(_range, Range):
+        _range = Range(_range)
+    return _range.key
+
+
+class _Node(object):
+    __slots__ = ('key', 'item', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, key, item, priority):
+        self.key = key
+        self.item = item
+        self.priority = priority
+        self.left = self.right = None
+        self.max_end = key[1]
+
+    def update(self):
+        max_end = self.key[1]
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+        self.max_end = max_end
+
+
+def _merge(left, right):
+    """Joins two treaps where every key of `left` sorts before `right`"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+def _split(node, key):
+    """Splits a treap into keys before `key` and keys from `key` on"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.update()
+    return left, node
+
+
+class RangeIndex(object):
+    """Interval tree over many Ranges
+
+    >>> index = RangeIndex(bookings)
+    >>> index.at("tomorrow at 3pm")
+    [<timestring.Range From 05/14/13 00:00:00 to 05/16/13 00:00:00 4483019280>]
+
+    A treap ordered by (start, end) where every node also knows the largest
+    end below it, so subtrees that cannot match are skipped. Bounds are
+    compared in epoch microseconds, naive datetimes are taken as UTC and
+    'infinity' bounds are open ended.
+    """
+    def __init__(self, ranges=()):
+        self._root = None
+        self._count = 0
+        self._seq = 0
+        self.update(ranges, bulk=True)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for node in self._walk():
+            yield node.item
+
+    def __contains__(self, _range):
+        return self._find(_range) is not None
+
+    def _entry(self, _range):
+        if not isinstance(_range, Range):
+            _range = Range(_range)
+        start, end = bounds(_range)
+        self._seq += 1
+        return (start, end, self._seq), _range
+
+    def update(self, ranges, bulk=False):
+        """Adds many ranges, rebuilding the tree in one pass when it is empty or `bulk`"""
+        entries = [self._entry(_range) for _range in ranges]
+        if not entries:
+            return
+        if not bulk and self._root is not None and len(entries) < self._count:
+            for key, _range in entries:
+                self._insert(key, _range)
+            return
+
+        entries.extend((node.key, node.item) for node in self._walk())
+        entries.sort(key=lambda entry: entry[0])
+        # priorities drawn at random then handed out top down keep the heap order
+        from random import random
+        priorities = sorted((random() for _ in entries), reverse=True)
+        nodes = [None] * len(entries)
+
+        def build(lo, hi, depth, level):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = nodes[mid] = _Node(entries[mid][0], entries[mid][1], None)
+            level.setdefault(depth, []).append(node)
+            node.left = build(lo, mid, depth + 1, level)
+            node.right = build(mid + 1, hi, depth + 1, level)
+            node.update()
+            return node
+
+        level = {}
+        root = build(0, len(entries), 0, level)
+        priorities = iter(priorities)
+        for depth in sorted(level):
+            for node in level[depth]:
+                node.priority = next(priorities)
+        self._root = root
+        self._count = len(entries)
+
+    def add(self, _range):
+        key, _range = self._entry(_range)
+        self._insert(key, _range)
+
+    def _insert(self, key, _range):
+        left, right = _split(self._root, key)
+        from random import random
+        self._root = _merge(_merge(left, _Node(key, _range, random())), right)
+        self._count += 1
+
+    def _find(self, _range):
+        if not isinstance(_range, Range):
+            _range = Range(_range)
+        start, end = bounds(_range)
+        node = self._root
+        found = None
+        # walk down to the first key with these bounds, then scan equal bounds in order
+        stack = []
+        while node is not None:
+            if node.key[:2] < (start, end):
+                node = node.right
+            else:
+                stack.append(node)
+                node = node.left
+        while stack:
+            node = stack.pop()
+            if node.key[:2] != (start, end):
+                break
+            if node.item is _range:
+                return node
+            if found is None and node.item == _range:
+                found = node
+            child = node.right
+            while child is not None:
+                stack.append(child)
+                child = child.left
+        return found
+
+    def remove(self, _range):
+        """Removes a range, preferring the very same object over an equal one"""
+        node = self._find(_range)
+        if node is None:
+            raise KeyError(_range)
+        left, right = _split(self._root, node.key)
+        _, right = _split(right, node.key[:2] + (node.key[2] + 1, ))
+        self._root = _merge(left, right)
+        self._count -= 1
+
+    def discard(self, _range):
+        try:
+            self.remove(_range)
+        except KeyError:
+            pass
+
+    def _walk(self):
+        stack, node = [], self._root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield node
+                node = node.right
+
+    def _search(self, match, min_end, max_start):
+        """Yields the items matching `match(start, end)` among nodes whose
+        subtree reaches `min_end` and which start no later than `max_start`"""
+        results = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            if node.max_end < min_end:
+                continue
+            start, end = node.key[0], node.key[1]
+            if node.right is not None and start <= max_start:
+                stack.append(node.right)
+            if match(start, end):
+                results.append(node)
+            if node.left is not None:
+                stack.append(node.left)
+        results.sort(key=lambda node: node.key)
+        return [node.item for node in results]
+
+    def at(self, date):
+        """Ranges that contain the Date (a stabbing query)"""
+        p = point(date)
+        return self._search(lambda start, end: start <= p <= end, p, p)
+
+    def overlapping(self, _range):
+        """Ranges that share at least one instant with `_range`"""
+        start, end = bounds(_range)
+        return self._search(lambda s, e: s <= end and e >= start, start, end)
+
+    def within(self, _range):
+        """Ranges contained in `_range`"""
+        start, end = bounds(_range)
+        return self._search(lambda s, e: start <= s and e <= end, start, end)
+
+    def containing(self, _range):
+        """Ranges that contain all of `_range`"""
+        start, end = bounds(_range)
+        return self._search(lambda s, e: s <= start and end <= e, end, start)
@@ -0,0 +1,161 @@
+from bisect import bisect_right
+from datetime import datetime
+
+from timestring.Date import Date
+from timestring.Range import Range
+from timestring.RangeIndex import INFINITY, bounds, point
+
+
+def _interval(_range):
+    if not isinstance(_range, Range):
+        _range = Range(_range)
+    start, end = bounds(_range)
+    return (start, end, _range.start.date, _range.end.date)
+
+
+def _coalesce(intervals):
+    """Merges sorted intervals that overlap or touch"""
+    merged = []
+    for interval in intervals:
+        if merged and interval[0] <= merged[-1][1]:
+            last = merged[-1]
+            if interval[1] > last[1]:
+                merged[-1] = (last[0], interval[1], last[2], interval[3])
+        else:
+            merged.append(interval)
+    return merged
+
+
+def _sorted_merge(a, b):
+    merged, i, j = [], 0, 0
+    while i < len(a) and j < len(b):
+        if a[i][:2] <= b[j][:2]:
+            merged.append(a[i])
+            i += 1
+        else:
+            merged.append(b[j])
+            j += 1
+    merged.extend(a[i:])
+    merged.extend(b[j:])
+    return merged
+
+
+class RangeSet(object):
+    """A sorted, non-overlapping and coalesced set of Ranges
+
+    >>> RangeSet(["jan 1st 2014 to jan 10th 2014", "jan 5th 2014 to jan 20th 2014"])
+    <timestring.RangeSet [From 01/01/14 00:00:00 to 01/20/14 00:00:00] 4483019280>
+
+    Bounds are closed, like `Range.__contains__`, so ranges that touch are
+    coalesced. Set operations are single merge passes over both sets and
+    membership is a bisect. 'infinity' bounds are open ended.
+    """
+    def __init__(self, ranges=()):
+        if isinstance(ranges, RangeSet):
+            self._intervals = list(ranges._intervals)
+        else:
+            if isinstance(ranges, (Range, str)):
+                ranges = [ranges]
+            self._intervals = _coalesce(sorted((_interval(_range) for _range in ranges), key=lambda i: i[:2]))
+        self._starts = [interval[0] for interval in self._intervals]
+
+    @classmethod
+    def _from_intervals(cls, intervals):
+        new = cls()
+        new._intervals = intervals
+        new._starts = [interval[0] for interval in intervals]
+        return new
+
+    def __repr__(self):
+        return "<timestring.RangeSet [%s] %s>" % (', '.join(map(str, self)), id(self))
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def __iter__(self):
+        for interval in self._intervals:
+            yield Range(interval[2], interval[3])
+
+    def __getitem__(self, index):
+        interval = self._intervals[index]
+        return Range(interval[2], interval[3])
+
+    def __eq__(self, other):
+        if not isinstance(other, RangeSet):
+            other = RangeSet(other)
+        return [i[:2] for i in self._intervals] == [i[:2] for i in other._intervals]
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __contains__(self, other):
+        if isinstance(other, (Date, datetime)):
+            start = end = point(other)
+        else:
+            # strings are read as a Range, like Range.__contains__ does
+            start, end = bounds(other)
+        index = bisect_right(self._starts, start) - 1
+        return index >= 0 and end <= self._intervals[index][1]
+
+    def add(self, _range):
+        self._intervals = _coalesce(_sorted_merge(self._intervals, [_interval(_range)]))
+        self._starts = [interval[0] for interval in self._intervals]
+
+    def union(self, other):
+        if not isinstance(other, RangeSet):
+            other = RangeSet(other)
+        return RangeSet._from_intervals(_coalesce(_sorted_merge(self._intervals, other._intervals)))
+
+    def intersection(self, other):
+        if not isinstance(other, RangeSet):
+            other = RangeSet(other)
+        a, b = self._intervals, other._intervals
+        result, i, j = [], 0, 0
+        while i < len(a) and j < len(b):
+            start = a[i] if a[i][0] >= b[j][0] else b[j]
+            end = a[i] if a[i][1] <= b[j][1] else b[j]
+            if start[0] <= end[1]:
+                result.append((start[0], end[1], start[2], end[3]))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return RangeSet._from_intervals(result)
+
+    def difference(self, other):
+        if not isinstance(other, RangeSet):
+            other = RangeSet(other)
+        b = other._intervals
+        result, j = [], 0
+        for interval in self._intervals:
+            start, start_date = interval[0], interval[2]
+            # skip what ends before this interval
+            while j < len(b) and b[j][1] < start:
+                j += 1
+            k = j
+            while k < len(b) and b[k][0] <= interval[1]:
+                if b[k][0] > start:
+                    result.append((start, b[k][0], start_date, b[k][2]))
+                if b[k][1] > start:
+                    start, start_date = b[k][1], b[k][3]
+                k += 1
+            if start < interval[1]:
+                result.append((start, interval[1], start_date, interval[3]))
+        return RangeSet._from_intervals(result)
+
+    def complement(self):
+        """Everything outside of this set, from -infinity to infinity"""
+        result = []
+        start, start_date = -INFINITY, 'infinity'
+        for interval in self._intervals:
+            if interval[0] > start:
+                result.append((start, interval[0], start_date, interval[2]))
+            start, start_date = interval[1], interval[3]
+        if start < INFINITY:
+            result.append((start, INFINITY, start_date, 'infinity'))
+        return RangeSet._from_intervals(result)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __invert__ = complement
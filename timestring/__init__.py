@@ -1,6 +1,4 @@
 import re
-import sys
-import argparse
 from datetime import datetime
 
 __version__ = VERSION = version = '1.6.2'
@@ -16,42 +14,37 @@ class TimestringInvalid(Exception):
 
 from .Date import Date
 from .Range import Range
-from .timestring_re import TIMESTRING_RE
+from .Delta import Delta
+from .Duration import Duration
+from . import timestring_re
+from .timestring_re import TIMESTRING_RE, LazyPattern, set_engine, get_engine
+from .cache import enable_cache, disable_cache, clear_cache, cache_info
+from .timezones import set_backend, get_backend
+from .instrument import stats, instrumented, enable_stats, disable_stats
+from .vectorized import parse_many, parse_range_many
+from .compact import CompactDate, CompactRange
+from .RangeIndex import RangeIndex
+from .RangeSet import RangeSet
+from .RangeArray import RangeArray
+from .Buckets import Buckets
 
 
-try:
-    """Register psycopg2 Adapters
+# psycopg2 adapters are registered once psycopg2 itself gets imported
+from . import postgres
+postgres.install()
 
-    if psycopg2 is installed then automatically register
-    the adapters for Date and Range.
 
-    >>> db.mogrify("insert into my_table (range) values (%s);", 
-                   timestring.Range("next week"))
-    "insert into my_table (range) values (tstzrange('2014-03-03 00:00:00'::timestamptz, '2014-03-10 00:00:00'::timestamptz));"
-    """ 
-    from psycopg2.extensions import register_adapter
-    from psycopg2.extensions import AsIs
+# findall/finditer matches that are returned as a Range rather than a Date
+RANGE_MATCH = LazyPattern(r'((next|last)\s(\d+|couple(\sof))\s(weeks|months|quarters|years))|(between|from)', re.I)
 
-    def adapt_date(date):
-        if date.tz:
-            return AsIs("'%s'::timestamptz" % str(date.date))
-        else:
-            return AsIs("'%s'::timestamp" % str(date.date))
-
-    def adapt_range(_range):
-        if _range.start.tz:
-            return AsIs("tstzrange('%s', '%s')" % (str(_range.start.date), str(_range.end.date)))
-        else:
-            return AsIs("tsrange('%s', '%s')" % (str(_range.start.date), str(_range.end.date)))
 
-    register_adapter(Date, adapt_date)
-    register_adapter(Range, adapt_range)
+def _resolve(text, now=None):
+    if RANGE_MATCH.match(text):
+        return Range(text, now=now)
+    return Date(text, now=now)
 
-except ImportError:
-    pass
 
-
-def findall(text):
+def findall(text, now=None):
     """Find all the timestrings within a block of text.
 
     >>> timestring.findall("once upon a time, about 3 weeks ago, there was a boy whom was born on august 15th at 7:20 am. epic.")
@@ -60,20 +53,83 @@ def findall(text):
      ('august 15th at 7:20 am', <timestring.Date 2014-08-15 07:20:00 4483019344>)
     ]
     """
-    results = TIMESTRING_RE.findall(text)
-    dates = []
-    for date in results:
-        if re.compile('((next|last)\s(\d+|couple(\sof))\s(weeks|months|quarters|years))|(between|from)', re.I).match(date[0]):
-            dates.append((date[0].strip(), Range(date[0])))
+    return [(match, value) for span, match, value in finditer(text, now=now)]
+
+
+def _chunks(source, chunk_size):
+    if isinstance(source, (str, type(u''))):
+        # already in memory, nothing to gain by slicing it up
+        yield source
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+class _Scanner(object):
+    """The state `finditer` carries between chunks"""
+    def __init__(self, overlap=256, now=None):
+        self.overlap = overlap
+        self.now = now
+        self.buf = ''
+        self.base = 0  # offset of buf[0] within the whole input
+        self.pos = 0   # where to resume scanning within buf
+
+    def scan(self, chunk=None):
+        """Adds `chunk` to the buffer, None at the end of the input, and
+        yields every match that can no longer grow"""
+        done = chunk is None
+        if not done:
+            self.buf += chunk
+        buf, pos = self.buf, self.pos
+
+        limit = len(buf) if done else len(buf) - self.overlap
+        for match in timestring_re.PATTERN.finditer(buf, pos):
+            if match.end() > limit and not done:
+                # may continue in the next chunk
+                break
+            pos = match.end()
+            text = match.group(1)
+            stripped = text.strip()
+            start = self.base + match.start() + len(text) - len(text.lstrip())
+            yield (start, start + len(stripped)), stripped, _resolve(text, self.now)
         else:
-            dates.append((date[0].strip(), Date(date[0])))
-    return dates
+            pos = max(pos, limit)
+
+        # keep a character before `pos` for the lookbehinds in TIMESTRING_RE
+        trim = max(pos - 1, 0)
+        self.buf, self.base, self.pos = buf[trim:], self.base + trim, pos - trim
+
+
+def finditer(source, chunk_size=65536, overlap=256, now=None):
+    """Lazily find the timestrings within a string, file object or iterable of chunks.
+
+    >>> for span, text, value in timestring.finditer(open("tickets.txt")):
+    ...     print(span, text, value)
+    (24, 35) 3 weeks ago <timestring.Date 2014-02-09 00:00:00 4483019280>
+
+    `span` is the offset of `text` in the whole input. Only `chunk_size` plus
+    `overlap` characters are held at once, matches ending within `overlap` of
+    the end of what has been read are held back until more input arrives.
+    Relative matches all resolve against `now`, read once when not provided.
+    """
+    scanner = _Scanner(overlap, now or datetime.now())
+    for chunk in _chunks(source, chunk_size):
+        for found in scanner.scan(chunk):
+            yield found
+    for found in scanner.scan():
+        yield found
 
 
-def parse(string):
+def parse(string, now=None):
     try:
-        matches = TIMESTRING_RE.search(string).groupdict()
-        date = Date(string)
+        matches = timestring_re.PATTERN.search(string).groupdict()
+        date = Date(string, now=now)
         result = {}
         for k,v in matches.items():
             if v:
@@ -94,24 +150,25 @@ def now():
     return Date(datetime.now())
 
 
+def scan_files(paths, workers=1, segment_size=None, overlap=256, now=None):
+    """Yields (path, offset, text, start, end) for every timestring within the files at `paths`.
+
+    >>> for record in timestring.scan_files(glob('archive/*.txt'), workers=8):
+    ...     print(record.path, record.offset, record.text, record.start, record.end)
+
+    See `timestring.scan`, files are memory mapped and scanned in a process pool.
+    Requires python 3.
+    """
+    # mmap and multiprocessing are only imported for scanning
+    from .scan import scan_files
+    return scan_files(paths, workers, segment_size, overlap, now)
+
+
 def main():
-    parser = argparse.ArgumentParser(prog='timestring',
-                                     add_help=True,
-                                     formatter_class=argparse.RawDescriptionHelpFormatter,
-                                     epilog=""" """)
-    parser.add_argument('--version', action='version', version="timestring v%s - http://github.com/stevepeak/timestring" % version)
-    parser.add_argument('-d', '--date', action='store_true')
-    parser.add_argument('--verbose', '-v', action="store_true", help="Verbose mode")
-    parser.add_argument('args', nargs="+", help="Time input")
-
-    if len(sys.argv) == 1:
-        parser.print_help()
-    else:
-        args = parser.parse_args()
-        if args.date:
-            print(Date(" ".join(args.args), verbose=args.verbose))
-        else:
-            print(Range(" ".join(args.args), verbose=args.verbose))
+    # argparse and friends are only imported for the command line
+    from .cli import main
+    main()
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,134 @@
+"""asyncio wrappers that keep parsing off the event loop
+
+>>> from timestring import aio
+>>> matches = await aio.afindall(message)
+>>> async for span, text, value in aio.afinditer(request.content.iter_chunked(65536)):
+...     print(span, text, value)
+
+Inputs shorter than `inline_size` are parsed right on the loop, scheduling
+them would cost more than parsing them. Anything longer runs in `executor`
+(the loop's default one when None) with at most `concurrency` jobs in flight
+per event loop, callers beyond that wait for a free slot.
+
+Requires python 3.6+, import it explicitly, `timestring` does not.
+"""
+import codecs
+import asyncio
+import weakref
+from datetime import datetime
+from functools import partial
+
+from timestring import findall, _Scanner
+from timestring.vectorized import parse_many, _numpy
+
+
+# characters (findall, finditer) or items (parse_many) handled inline
+INLINE_SIZE = 2048
+INLINE_ITEMS = 32
+
+
+class Offloader(object):
+    """Runs callables in an executor, at most `concurrency` at a time per loop"""
+    def __init__(self, executor=None, concurrency=4, inline_size=INLINE_SIZE, inline_items=INLINE_ITEMS):
+        self.executor = executor
+        self.concurrency = concurrency
+        self.inline_size = inline_size
+        self.inline_items = inline_items
+        # asyncio primitives belong to one loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, loop):
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+
+OFFLOADER = Offloader()
+
+
+def configure(executor=None, concurrency=4, inline_size=INLINE_SIZE, inline_items=INLINE_ITEMS):
+    """Replaces the default executor, concurrency limit and inline thresholds.
+
+    >>> aio.configure(executor=ProcessPoolExecutor(4), concurrency=8)
+    """
+    global OFFLOADER
+    OFFLOADER = Offloader(executor, concurrency, inline_size, inline_items)
+    return OFFLOADER
+
+
+async def afindall(text, now=None, offloader=None):
+    """`timestring.findall` for coroutines"""
+    offloader = offloader or OFFLOADER
+    if len(text) < offloader.inline_size:
+        return findall(text, now=now)
+    return await offloader.run(findall, text, now=now)
+
+
+def _feed(scanner, chunk):
+    # returns the scanner too, so a process pool hands back its new state
+    return scanner, list(scanner.scan(chunk))
+
+
+async def _chunks(source):
+    if isinstance(source, (str, bytes)):
+        yield source
+    elif hasattr(source, '__aiter__'):
+        async for chunk in source:
+            yield chunk
+    else:
+        for chunk in source:
+            yield chunk
+
+
+async def afinditer(source, overlap=256, now=None, offloader=None):
+    """`timestring.finditer` over an async iterable of chunks, also a string, bytes or iterable
+
+    Bytes are decoded as utf-8, invalid or truncated input raises UnicodeDecodeError.
+
+    The next chunk is only read once the matches of the previous one were
+    consumed, so a slow consumer holds back the producer.
+    """
+    offloader = offloader or OFFLOADER
+    scanner = _Scanner(overlap, now or datetime.now())
+    # bytes chunks may split a multi-byte character
+    decode = codecs.getincrementaldecoder('utf-8')().decode
+    async for chunk in _chunks(source):
+        if isinstance(chunk, bytes):
+            chunk = decode(chunk)
+        if len(scanner.buf) + len(chunk) < offloader.inline_size:
+            found = list(scanner.scan(chunk))
+        else:
+            scanner, found = await offloader.run(_feed, scanner, chunk)
+        for item in found:
+            yield item
+    # a multi-byte character cut off by the end of the input raises
+    decode(b'', final=True)
+    for item in scanner.scan():
+        yield item
+
+
+async def aparse_many(strings, tz=None, now=None, batch_size=4096, offloader=None):
+    """`timestring.parse_many` for coroutines
+
+    Large inputs are parsed `batch_size` values at a time, batches run
+    concurrently within the offloader's limit.
+    """
+    offloader = offloader or OFFLOADER
+    now = now or datetime.now()
+    if hasattr(strings, 'tolist'):
+        strings = strings.tolist()
+    if len(strings) < offloader.inline_items:
+        return parse_many(strings, tz=tz, now=now)
+    if len(strings) <= batch_size:
+        return await offloader.run(parse_many, strings, tz=tz, now=now)
+
+    numpy = _numpy()
+    batches = await asyncio.gather(*[offloader.run(parse_many, strings[i:i + batch_size], tz=tz, now=now)
+                                     for i in range(0, len(strings), batch_size)])
+    return numpy.concatenate([values for values, _ in batches]), numpy.concatenate([valid for _, valid in batches])
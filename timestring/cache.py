@@ -0,0 +1,124 @@
+import re
+import threading
+from collections import namedtuple, OrderedDict
+
+from timestring.timestring_re import LazyPattern
+
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'evictions', 'expirations', 'maxsize', 'currsize'))
+
+# Returned by ParseCache.get when there is nothing usable for the key.
+MISS = object()
+
+# The active cache, None while caching is disabled.
+CACHE = None
+
+# Phrases resolved against the current instant (microseconds) are never cached.
+UNCACHEABLE = LazyPattern(r"\bnow\b|\bthis\s+(\S+\s+)?(minutes?|seconds?|[ms])\b", re.I)
+# Phrases that depend on the current hour or minute, not only the current day.
+MINUTE_RELATIVE = LazyPattern(r"\bthis\s+time\b", re.I)
+HOUR_RELATIVE = LazyPattern(r"\bthis\s+(\S+\s+)?(hours?|h)\b", re.I)
+# Inputs that do not depend on the current day at all.
+ABSOLUTE = LazyPattern(r"^\s*(infinity|\d{10}|\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+-\d{2})\s*$", re.I)
+
+
+def granularity(text):
+    """Returns how often a cached resolution of `text` goes stale.
+
+    >>> granularity('last 7 days')
+    'day'
+
+    `None` means the result never goes stale and `False` that it must not be cached.
+    """
+    if ABSOLUTE.match(text):
+        return None
+    if UNCACHEABLE.search(text):
+        return False
+    if MINUTE_RELATIVE.search(text):
+        return 'minute'
+    if HOUR_RELATIVE.search(text):
+        return 'hour'
+    return 'day'
+
+
+def make_key(kind, text, tz, offset, start_of_week):
+    """Builds a hashable cache key for one Date or Range construction"""
+    if isinstance(offset, dict):
+        offset = tuple(sorted(offset.items()))
+    return (kind, text, str(tz) if tz else None, offset, start_of_week)
+
+
+class ParseCache(object):
+    """Bounded, thread-safe LRU of resolved timestrings.
+
+    Each entry carries the stamp (ie. the local day) it was resolved for and
+    is dropped when looked up with a different stamp.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, stamp=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            if entry[0] != stamp:
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+            # re-insert as the most recently used
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, stamp=None):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (stamp, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions, self.expirations, self.maxsize, len(self._entries))
+
+
+def enable_cache(maxsize=1024):
+    """Turns on memoization of `Date` and `Range` string parsing.
+
+    >>> timestring.enable_cache(maxsize=4096)
+    >>> timestring.Date('last 7 days')
+    """
+    global CACHE
+    CACHE = ParseCache(maxsize)
+    return CACHE
+
+
+def disable_cache():
+    global CACHE
+    CACHE = None
+
+
+def clear_cache():
+    if CACHE is not None:
+        CACHE.clear()
+
+
+def cache_info():
+    """Returns the hit/miss/eviction counters, or None when caching is disabled"""
+    if CACHE is not None:
+        return CACHE.info()
@@ -0,0 +1,140 @@
+import sys
+import csv
+import json
+import argparse
+from datetime import datetime
+from functools import partial
+
+from timestring import version
+from timestring.Date import Date
+from timestring.Range import Range
+
+
+FIELDS = dict(date=('input', 'date', 'epoch', 'error'),
+              range=('input', 'start', 'end', 'start_epoch', 'end_epoch', 'error'),
+              scan=('path', 'offset', 'text', 'start', 'end'))
+
+
+def _epoch(date):
+    if date.date != 'infinity':
+        return date.to_unixtime()
+
+
+def convert(text, date=False, now=None):
+    """Resolves one batch row into a record of plain values"""
+    try:
+        if date:
+            _date = Date(text, now=now)
+            return dict(input=text, date=str(_date), epoch=_epoch(_date))
+        _range = Range(text, now=now)
+        return dict(input=text, start=str(_range.start), end=str(_range.end),
+                    start_epoch=_epoch(_range.start), end_epoch=_epoch(_range.end))
+    except Exception as e:
+        return dict(input=text, error=str(e) or e.__class__.__name__)
+
+
+def rows(source, column=None):
+    """Yields the inputs of a batch, one per line or one per row of a csv `column`"""
+    if column is None:
+        for line in source:
+            line = line.strip()
+            if line:
+                yield line
+    elif column.isdigit():
+        for row in csv.reader(source):
+            if len(row) > int(column):
+                yield row[int(column)]
+    else:
+        for row in csv.DictReader(source):
+            yield row.get(column)
+
+
+def batch(source, output, date=False, column=None, format='jsonl', jobs=1, chunksize=256, now=None):
+    """Resolves every row of `source` and writes one record per row to `output`.
+
+    With `jobs` > 1 rows are sent to a process pool `chunksize` at a time and
+    written back in input order. All rows resolve against the same `now`.
+    """
+    func = partial(convert, date=date, now=now or datetime.now())
+    inputs = rows(source, column)
+    write = _writer(output, FIELDS['date' if date else 'range'], format)
+
+    if jobs > 1:
+        from multiprocessing import Pool
+        pool = Pool(jobs)
+        try:
+            for record in pool.imap(func, inputs, chunksize):
+                write(record)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for text in inputs:
+            write(func(text))
+    output.flush()
+
+
+def _writer(output, fields, format):
+    if format == 'csv':
+        writer = csv.DictWriter(output, fields, lineterminator='\n')
+        writer.writeheader()
+        return writer.writerow
+    return lambda record: output.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def scan(paths, output, format='jsonl', jobs=1, now=None):
+    """Writes one record per timestring found within the files at `paths` to `output`"""
+    from timestring import scan_files
+    write = _writer(output, FIELDS['scan'], format)
+    for record in scan_files(paths, workers=jobs, now=now):
+        write(dict(path=record.path, offset=record.offset, text=record.text, start=str(record.start),
+                   end=str(record.end) if record.end is not None else None))
+    output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='timestring',
+                                     add_help=True,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=""" """)
+    parser.add_argument('--version', action='version', version="timestring v%s - http://github.com/stevepeak/timestring" % version)
+    parser.add_argument('-d', '--date', action='store_true')
+    parser.add_argument('--verbose', '-v', action="store_true", help="Verbose mode")
+    parser.add_argument('-b', '--batch', nargs='?', const='-', metavar='FILE',
+                        help="Resolve newline delimited inputs from FILE, or stdin")
+    parser.add_argument('-s', '--scan', action='store_true',
+                        help="Find the timestrings within the files given as arguments (python 3)")
+    parser.add_argument('--column', help="Read the batch as csv and resolve this column (name or index)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', help="Batch and scan output format")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Batch and scan worker processes")
+    parser.add_argument('--chunksize', type=int, default=256, help="Batch rows sent to a worker at a time")
+    parser.add_argument('args', nargs="*", help="Time input, or the files to --scan")
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+    else:
+        args = parser.parse_args()
+        if args.verbose:
+            # the trace of each parse, see `timestring.instrument`
+            import logging
+            logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+        if args.batch:
+            source = sys.stdin if args.batch == '-' else open(args.batch)
+            try:
+                batch(source, sys.stdout, date=args.date, column=args.column,
+                      format=args.format, jobs=args.jobs, chunksize=args.chunksize)
+            finally:
+                if source is not sys.stdin:
+                    source.close()
+        elif not args.args:
+            parser.error("Time input is required")
+        elif args.scan:
+            scan(args.args, sys.stdout, format=args.format, jobs=args.jobs)
+        elif args.date:
+            print(Date(" ".join(args.args), verbose=args.verbose))
+        else:
+            print(Range(" ".join(args.args), verbose=args.verbose))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+
+from timestring.Date import Date, EPOCH, INFINITY, epoch_us
+from timestring.Range import Range
+
+
+def _pack(date, epoch):
+    """Returns the stored form of a <datetime> and its tzinfo"""
+    if date == 'infinity':
+        return 'infinity', None
+    if epoch:
+        # wall clock microseconds, so the tzinfo can be re-attached as is
+        delta = date.replace(tzinfo=None) - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds, date.tzinfo
+    return date, None
+
+
+def _unpack(value, tz):
+    if value == 'infinity' or isinstance(value, datetime):
+        return value
+    date = EPOCH + timedelta(microseconds=value)
+    if tz is not None:
+        return date.replace(tzinfo=tz)
+    return date
+
+
+def _keys(date):
+    """Returns the ordering key and naivety of a <datetime>, as `Date._keys` does"""
+    if date == 'infinity':
+        return INFINITY, None
+    return epoch_us(date), date.tzinfo is None
+
+
+class CompactDate(object):
+    """Memory compact, read only form of a `Date`
+
+    >>> CompactDate.from_date(Date("today"), epoch=True)
+
+    Holds either a <datetime> or, with `epoch=True`, integer wall clock
+    microseconds since 1970 plus a reference to the (shared) tzinfo.
+    The original input is only kept when asked for.
+    """
+    __slots__ = ('_value', '_tz', '_original')
+
+    def __init__(self, date, tz=None, original=None):
+        self._value = date
+        self._tz = tz
+        self._original = original
+
+    @classmethod
+    def from_date(cls, date, keep_original=False, epoch=False):
+        if not isinstance(date, Date):
+            date = Date(date)
+        value, tz = _pack(date.date, epoch)
+        return cls(value, tz, getattr(date, '_original', None) if keep_original else None)
+
+    @property
+    def date(self):
+        return _unpack(self._value, self._tz)
+
+    @property
+    def tz(self):
+        date = self.date
+        if date != 'infinity':
+            return date.tzinfo
+
+    @property
+    def original(self):
+        return self._original
+
+    @property
+    def key(self):
+        """Ordering key in epoch microseconds, the same as `Date.key`"""
+        return _keys(self.date)[0]
+
+    def to_date(self):
+        return Date(self.date)
+
+    def format(self, format_string='%x %X'):
+        return self.to_date().format(format_string)
+
+    def __repr__(self):
+        return "<timestring.CompactDate %s %s>" % (str(self), id(self))
+
+    def __str__(self):
+        return str(self.date)
+
+    def __eq__(self, other):
+        if isinstance(other, CompactDate):
+            return _keys(self.date) == _keys(other.date)
+        return self.to_date() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        # equal Dates hash the same
+        return hash(self.key)
+
+
+class CompactRange(object):
+    """Memory compact, read only form of a `Range`
+
+    >>> CompactRange.from_range(Range("this month"), epoch=True)
+
+    Stores the two bounds directly instead of two `Date` objects, see `CompactDate`.
+    Each bound keeps its own zone, `end_tz` defaults to `tz`.
+    """
+    __slots__ = ('_start', '_end', '_tz', '_end_tz', '_original')
+
+    def __init__(self, start, end, tz=None, original=None, end_tz=None):
+        self._start = start
+        self._end = end
+        self._tz = tz
+        self._end_tz = end_tz if end_tz is not None else tz
+        self._original = original
+
+    @classmethod
+    def from_range(cls, _range, keep_original=False, epoch=False):
+        original = None
+        if not isinstance(_range, Range):
+            original = _range
+            _range = Range(_range)
+        start, start_tz = _pack(_range.start.date, epoch)
+        end, end_tz = _pack(_range.end.date, epoch)
+        return cls(start, end, start_tz, original if keep_original else None, end_tz)
+
+    @property
+    def start(self):
+        return Date(_unpack(self._start, self._tz))
+
+    @property
+    def end(self):
+        return Date(_unpack(self._end, self._end_tz))
+
+    @property
+    def tz(self):
+        return self.to_range().tz
+
+    @property
+    def original(self):
+        return self._original
+
+    def _keys(self):
+        (start, start_naive), (end, end_naive) = _keys(_unpack(self._start, self._tz)), _keys(_unpack(self._end, self._end_tz))
+        if start == INFINITY:
+            # open towards the past
+            start = -INFINITY
+        return (start, end), start_naive if end_naive is None else end_naive
+
+    @property
+    def key(self):
+        """Ordering key, the same as `Range.key`"""
+        return self._keys()[0]
+
+    def __getitem__(self, index):
+        return (self.start, self.end)[index]
+
+    def to_range(self):
+        return Range(self.start, self.end)
+
+    def format(self, format_string='%x %X'):
+        return self.to_range().format(format_string)
+
+    def __len__(self):
+        return len(self.to_range())
+
+    def __contains__(self, other):
+        return other in self.to_range()
+
+    def __repr__(self):
+        return "<timestring.CompactRange %s %s>" % (str(self), id(self))
+
+    def __str__(self):
+        return self.format()
+
+    def __eq__(self, other):
+        if isinstance(other, CompactRange):
+            return self._keys() == other._keys()
+        return self.to_range() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        # equal Ranges hash the same
+        return hash(self.key)
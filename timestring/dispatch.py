@@ -0,0 +1,71 @@
+import re
+from datetime import datetime, timedelta
+
+from timestring.timestring_re import LazyPattern
+
+
+# Tiers in the order they are tried. `regex` is the full TIMESTRING_RE grammar.
+TIERS = ('literal', 'pg', 'iso', 'unixtime', 'regex')
+
+LITERALS = ('infinity', 'now')
+
+# postgresql timestamptz output ie. "2014-03-06 15:33:43.764419-05"
+PG = LazyPattern(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+-\d{2}")
+
+# ISO-8601 ie. "2013-09-10", "2013-09-10T10:45" or "2013-09-10 10:45:50"
+# The character classes mirror the `year_3`, `hour_2` ... groups of TIMESTRING_RE
+# so anything that does not match falls back to the full grammar unchanged.
+ISO = LazyPattern(r"""
+    (?P<year>[12][089]\d{2})-(?P<month>[01]\d)-(?P<day>[0-3]\d)
+    ([Tt\s](?P<hour>[012]\d):(?P<minute>[0-5]\d)(:(?P<second>[0-5]\d))?)?$
+""", re.X)
+
+UNIXTIME = LazyPattern(r"\d{10}$")
+
+
+def classify(text):
+    """Returns the name of the tier that handles `text`
+
+    >>> classify("2013-09-10T12:00:00")
+    'iso'
+    >>> classify("last 7 days")
+    'regex'
+    """
+    if text in LITERALS:
+        return 'literal'
+    if PG.match(text):
+        return 'pg'
+    text = text.strip()
+    if text[:1].isdigit():
+        if ISO.match(text):
+            return 'iso'
+        if UNIXTIME.match(text):
+            return 'unixtime'
+    return 'regex'
+
+
+def fast_parse(text):
+    """Resolves machine formatted `text` without running TIMESTRING_RE.
+
+    Returns `(tier, date, has_time)` where `date` is None for the
+    `literal` and `regex` tiers, which `Date` handles itself.
+    """
+    if text in LITERALS:
+        return 'literal', None, False
+
+    if PG.match(text):
+        return 'pg', datetime.strptime(text[:-3], "%Y-%m-%d %H:%M:%S.%f") - timedelta(hours=int(text[-3:])), True
+
+    stripped = text.strip()
+    if stripped[:1].isdigit():
+        res = ISO.match(stripped)
+        if res:
+            if res.group('hour') is None:
+                return 'iso', datetime(int(res.group('year')), int(res.group('month')), int(res.group('day'))), False
+            return 'iso', datetime(int(res.group('year')), int(res.group('month')), int(res.group('day')),
+                                   int(res.group('hour')), int(res.group('minute')), int(res.group('second') or 0)), True
+
+        if UNIXTIME.match(stripped):
+            return 'unixtime', datetime.fromtimestamp(int(stripped)), False
+
+    return 'regex', None, False
@@ -0,0 +1,262 @@
+"""Opt-in statistics of where parsing spends its time
+
+>>> with timestring.instrumented() as recorder:
+...     timestring.findall(text)
+>>> recorder.snapshot()['stages']['search']
+{'count': 12, 'seconds': 0.0041, 'self': 0.0041, 'nested': 0, 'failures': 3}
+
+While enabled, timed wrappers replace the entry points of each stage: the
+grammar search, `Date` and `Range` construction, comparisons, timezone
+resolution and `text2num`. Disabling puts the originals back, so nothing
+is paid while statistics are off. `seconds` includes the stages called
+within, `self` does not.
+
+Traces are logged on the `timestring` logger at DEBUG level, for every
+stage while statistics are enabled, and for the matches of `verbose`
+parses.
+"""
+import sys
+import threading
+from time import time
+from contextlib import contextmanager
+
+try:
+    from time import perf_counter as clock
+except ImportError:
+    clock = time
+
+
+# The active Recorder, None while statistics are disabled.
+RECORDER = None
+# The Recorder `stats()` reports once statistics were disabled.
+LAST = None
+
+# branch of the grammar => groups that show it matched
+BRANCHES = (
+    ('unixtime', ('unixtime', )),
+    ('relative', ('delta', 'delta_2')),
+    ('named_day', ('day_2', )),
+    ('month', ('month', 'month_1')),
+    ('numeric', ('year_3', 'month_2', 'month_4', 'year_5')),
+    ('time', ('hour', 'hour_2', 'hour_3')),
+    ('daytime', ('daytime', )),
+)
+
+# originals of the wrapped entry points, (owner, name, original)
+_INSTALLED = []
+
+
+def _logger():
+    import logging
+    return logging.getLogger('timestring')
+
+
+def trace(event, **fields):
+    """Logs one structured trace record, `fields` are also on the record as `fields`"""
+    logger = _logger()
+    if logger.isEnabledFor(10):
+        logger.debug("%s %s", event, " ".join("%s=%r" % item for item in sorted(fields.items())),
+                     extra=dict(event=event, fields=fields))
+
+
+class Recorder(object):
+    """Counters and timings of one instrumented period"""
+    def __init__(self, tracing=False):
+        self.tracing = tracing
+        self.stages = {}
+        self.branches = {}
+        self.tiers = {}
+        self.failures = {}
+        self.started = time()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = dict(count=0, seconds=0.0, self=0.0, nested=0, failures=0)
+        return stage
+
+    def enter(self):
+        stack = self._stack()
+        # seconds spent in the stages called within this one
+        stack.append(0.0)
+        return clock()
+
+    def exit(self, name, started, failed=False):
+        elapsed = clock() - started
+        stack = self._stack()
+        within = stack.pop()
+        stage = self._stage(name)
+        stage['count'] += 1
+        stage['seconds'] += elapsed
+        stage['self'] += elapsed - within
+        if stack:
+            stack[-1] += elapsed
+            stage['nested'] += 1
+        if failed:
+            stage['failures'] += 1
+            self.failures[name] = self.failures.get(name, 0) + 1
+        if self.tracing:
+            trace('stage', stage=name, seconds=elapsed, depth=len(stack), failed=failed)
+
+    def count(self, counters, name):
+        counters[name] = counters.get(name, 0) + 1
+
+    def matched(self, groups):
+        for branch, keys in BRANCHES:
+            for key in keys:
+                if groups.get(key):
+                    self.count(self.branches, branch)
+                    break
+
+    def snapshot(self):
+        from timestring import cache
+        info = cache.cache_info()
+        return dict(stages=dict((name, dict(stage)) for name, stage in self.stages.items()),
+                    branches=dict(self.branches), tiers=dict(self.tiers), failures=dict(self.failures),
+                    cache=dict(info._asdict()) if info is not None else None,
+                    elapsed=time() - self.started)
+
+
+def _timed(name, func, tier=False):
+    def timed(*args, **kwargs):
+        recorder = RECORDER
+        if recorder is None:
+            return func(*args, **kwargs)
+        started = recorder.enter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            recorder.exit(name, started, True)
+            raise
+        recorder.exit(name, started)
+        if tier and args[0]._tier:
+            recorder.count(recorder.tiers, '%s.%s' % (name, args[0]._tier))
+        return result
+    timed.__wrapped__ = func
+    timed.__name__ = getattr(func, '__name__', name)
+    timed.__doc__ = func.__doc__
+    return timed
+
+
+class TimedPattern(object):
+    """Wraps the active grammar pattern, see `timestring_re.PATTERN`"""
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def search(self, string, pos=0):
+        recorder = RECORDER
+        started = recorder.enter()
+        match = self.pattern.search(string, pos)
+        recorder.exit('search', started, match is None)
+        if match is not None:
+            recorder.matched(match.groupdict())
+        return match
+
+    def finditer(self, string, pos=0):
+        recorder = RECORDER
+        matches = self.pattern.finditer(string, pos)
+        while True:
+            started = recorder.enter()
+            match = next(matches, None)
+            # running out of matches is not a failure
+            recorder.exit('search', started)
+            if match is None:
+                return
+            recorder.matched(match.groupdict())
+            yield match
+
+    def __getattr__(self, name):
+        return getattr(self.pattern, name)
+
+
+def _entry_points():
+    from timestring import timezones
+    from timestring.Date import Date
+    from timestring.Range import Range
+    date_module, delta_module = sys.modules['timestring.Date'], sys.modules['timestring.Delta']
+    points = [(Date, '__init__', 'Date', True), (Range, '__init__', 'Range', True),
+              (Range, '__contains__', 'contains', False), (Range, 'cmp', 'compare', False),
+              (timezones, 'resolve', 'tz', False), (timezones, 'utcoffset', 'tz', False),
+              (date_module, 'text2num', 'text2num', False), (delta_module, 'text2num', 'text2num', False)]
+    points += [(owner, name, 'compare', False) for owner in (Date, Range)
+               for name in ('__eq__', '__lt__', '__gt__', '__le__', '__ge__')]
+    return points
+
+
+def _install():
+    from timestring import timestring_re
+    for owner, name, stage, tier in _entry_points():
+        original = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+        _INSTALLED.append((owner, name, original))
+        setattr(owner, name, _timed(stage, original, tier))
+    # Delta.parse is a classmethod, time the parsing of strings it interns
+    from timestring.Delta import Delta
+    original = Delta.__dict__['_parse']
+    _INSTALLED.append((Delta, '_parse', original))
+    Delta._parse = classmethod(_timed('Delta', original.__func__))
+    timestring_re.PATTERN = TimedPattern(timestring_re.PATTERN)
+
+
+def _uninstall():
+    from timestring import timestring_re
+    while _INSTALLED:
+        owner, name, original = _INSTALLED.pop()
+        setattr(owner, name, original)
+    if isinstance(timestring_re.PATTERN, TimedPattern):
+        timestring_re.PATTERN = timestring_re.PATTERN.pattern
+
+
+def enable_stats(tracing=False):
+    """Starts collecting statistics, into a new Recorder which is returned.
+
+    >>> timestring.enable_stats()
+    >>> timestring.stats()['branches']
+    {'relative': 3, 'month': 1}
+
+    `tracing` also logs every stage on the `timestring` logger.
+    """
+    global RECORDER
+    if not _INSTALLED:
+        _install()
+    RECORDER = Recorder(tracing)
+    return RECORDER
+
+
+def disable_stats():
+    global RECORDER, LAST
+    LAST = RECORDER or LAST
+    RECORDER = None
+    _uninstall()
+
+
+def stats():
+    """Returns the statistics collected since `enable_stats`, or of the last
+    instrumented period once disabled. None when never enabled"""
+    recorder = RECORDER or LAST
+    if recorder is not None:
+        return recorder.snapshot()
+
+
+@contextmanager
+def instrumented(tracing=False):
+    """Collects statistics within a `with` block, into the Recorder it returns
+
+    Statistics enabled before resume afterwards.
+    """
+    global RECORDER, LAST
+    previous = RECORDER
+    recorder = enable_stats(tracing)
+    try:
+        yield recorder
+    finally:
+        if previous is None:
+            disable_stats()
+        else:
+            LAST, RECORDER = recorder, previous
@@ -0,0 +1,147 @@
+"""Converts Range columns to and from Apache Arrow and pandas
+
+>>> table = pyarrow.table({'during': timestring.interop.to_arrow(ranges)})
+>>> ranges = timestring.interop.from_arrow(table['during'])
+>>> index = timestring.interop.to_interval_index(ranges)
+
+Conversions go through `RangeArray`, bounds are epoch microseconds in UTC
+tagged with the range's zone. Arrow columns are a struct of `start` and
+`end` timestamp[us] sharing the RangeArray buffers, infinite bounds keep
+their int64 sentinels. pandas timestamps are nanoseconds, infinite bounds
+become `PANDAS_INFINITY_NS`, a day short of `Timestamp.max` so that
+zones ahead of UTC can still show it, and its negative.
+"""
+from timestring import timezones
+from timestring.RangeArray import RangeArray
+from timestring.vectorized import _numpy, INFINITY_US, NEG_INFINITY_US
+
+
+# ratio of each timestamp unit to microseconds
+UNITS = dict(s=(1000000, 1), ms=(1000, 1), us=(1, 1), ns=(1, 1000))
+
+# infinite bounds of pandas timestamps, see above
+PANDAS_INFINITY_NS = 2 ** 63 - 1 - 86400 * 10 ** 9
+PANDAS_NEG_INFINITY_NS = -PANDAS_INFINITY_NS
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("timestring arrow conversions require pyarrow, `pip install pyarrow`")
+    return pyarrow
+
+
+def _pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError("timestring pandas conversions require pandas, `pip install pandas`")
+    return pandas
+
+
+def _range_array(ranges, tz=None):
+    if isinstance(ranges, RangeArray):
+        return ranges
+    ranges = list(ranges)
+    if tz is None:
+        tz = next((_range.tz for _range in ranges if _range.tz), None)
+    return RangeArray.from_ranges(ranges, tz=tz)
+
+
+def _tz_name(tz):
+    return timezones.name(tz) if tz is not None else None
+
+
+def to_arrow(ranges, tz=None):
+    """Returns a pyarrow StructArray of `start` and `end` timestamps
+
+    `ranges` is a RangeArray, which is not copied, or an iterable of Range.
+    The timestamps carry the zone of `tz`, of the RangeArray or of the
+    first aware Range.
+    """
+    pyarrow = _pyarrow()
+    numpy = _numpy()
+    array = _range_array(ranges, tz)
+    _type = pyarrow.timestamp('us', tz=_tz_name(tz or array.tz))
+    fields = [pyarrow.Array.from_buffers(_type, len(array), [None, pyarrow.py_buffer(numpy.ascontiguousarray(values))])
+              for values in (array._starts, array._ends)]
+    return pyarrow.StructArray.from_arrays(fields, names=['start', 'end'])
+
+
+def _from_timestamps(values, numpy):
+    """Returns the int64 microseconds of a pyarrow timestamp array, sentinels kept"""
+    if values.null_count:
+        raise ValueError("Ranges cannot have null bounds")
+    divide, multiply = UNITS[values.type.unit]
+    values = numpy.asarray(values.cast(_pyarrow().int64()))
+    if (divide, multiply) == (1, 1):
+        return values
+    infinite, neg_infinite = values == numpy.iinfo('int64').max, values <= -numpy.iinfo('int64').max
+    values = values // multiply * divide
+    return numpy.where(infinite, INFINITY_US, numpy.where(neg_infinite, NEG_INFINITY_US, values))
+
+
+def from_arrow(array):
+    """Returns the RangeArray of a struct column written by `to_arrow`
+
+    Also accepts chunked arrays and table columns, and any struct of two
+    timestamps (start first). Timestamp[us] columns without nulls are not
+    copied.
+    """
+    pyarrow = _pyarrow()
+    numpy = _numpy()
+    if isinstance(array, pyarrow.ChunkedArray):
+        array = array.combine_chunks()
+    if array.null_count:
+        raise ValueError("Null ranges have no RangeArray equivalent")
+    # flatten() honours the offset of sliced arrays, field() does not
+    starts, ends = array.flatten()[:2]
+    tz = starts.type.tz
+    return RangeArray(_from_timestamps(starts, numpy), _from_timestamps(ends, numpy),
+                      tz=timezones.resolve(tz) if tz else None)
+
+
+def _pandas_bounds(values, numpy):
+    """Converts int64 microseconds to nanoseconds, infinite bounds to the pandas sentinels"""
+    infinite, neg_infinite = values == INFINITY_US, values == NEG_INFINITY_US
+    finite = values[~(infinite | neg_infinite)]
+    if len(finite) and (finite.min() <= PANDAS_NEG_INFINITY_NS // 1000 or finite.max() >= PANDAS_INFINITY_NS // 1000):
+        raise ValueError("Bounds outside of the years pandas timestamps support")
+    nanoseconds = numpy.where(infinite | neg_infinite, 0, values) * 1000
+    nanoseconds[infinite] = PANDAS_INFINITY_NS
+    nanoseconds[neg_infinite] = PANDAS_NEG_INFINITY_NS
+    return nanoseconds
+
+
+def to_interval_index(ranges, closed='left', tz=None):
+    """Returns a pandas IntervalIndex of `ranges`, a RangeArray or iterable of Range"""
+    pandas = _pandas()
+    numpy = _numpy()
+    array = _range_array(ranges, tz)
+    tz = tz or array.tz
+    sides = []
+    for values in (array._starts, array._ends):
+        side = pandas.DatetimeIndex(_pandas_bounds(values, numpy).view('datetime64[ns]'))
+        if tz is not None:
+            side = side.tz_localize('UTC').tz_convert(_tz_name(tz))
+        sides.append(side)
+    return pandas.IntervalIndex.from_arrays(sides[0], sides[1], closed=closed)
+
+
+def _from_pandas(side, numpy):
+    # pandas before 2.0 only has nanoseconds
+    if getattr(side, 'unit', 'ns') != 'ns':
+        side = side.as_unit('ns')
+    values = side.asi8
+    infinite, neg_infinite = values >= PANDAS_INFINITY_NS, values <= PANDAS_NEG_INFINITY_NS
+    values = values // 1000
+    return numpy.where(infinite, INFINITY_US, numpy.where(neg_infinite, NEG_INFINITY_US, values))
+
+
+def from_interval_index(index):
+    """Returns the RangeArray of a datetime IntervalIndex, see `to_interval_index`"""
+    numpy = _numpy()
+    tz = index.left.tz
+    return RangeArray(_from_pandas(index.left, numpy), _from_pandas(index.right, numpy),
+                      tz=timezones.resolve(str(tz)) if tz is not None else None)
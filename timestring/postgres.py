@@ -0,0 +1,410 @@
+"""psycopg2 adapters for Date and Range
+
+>>> db.mogrify("insert into my_table (range) values (%s);",
+               timestring.Range("next week"))
+"insert into my_table (range) values (tstzrange('2014-03-03 00:00:00'::timestamptz, '2014-03-10 00:00:00'::timestamptz));"
+
+`install` registers the adapters as soon as psycopg2 is imported, so
+importing timestring never imports psycopg2 itself.
+
+`write_copy` and `CopyStream` serialize many rows for COPY in text or
+binary format, without psycopg2:
+
+>>> cursor.copy_expert("COPY bookings (id, during) FROM STDIN WITH (FORMAT binary)",
+                       CopyStream(((1, Range("next week")), ...), format='binary'))
+
+`register_typecasters` makes psycopg2 return Date and Range for timestamp,
+timestamptz, tsrange and tstzrange columns, `decode_ranges` and
+`decode_timestamps` do the same for strings already fetched.
+"""
+import sys
+import struct
+from datetime import datetime, timedelta
+
+from timestring.Date import Date, epoch_us
+from timestring.Range import Range
+from timestring import TimestringInvalid
+from timestring.timestring_re import LazyPattern
+
+try:
+    unicode
+except NameError:
+    unicode = str
+    long = int
+
+
+def adapt_date(date):
+    from psycopg2.extensions import AsIs
+    if date.tz:
+        return AsIs("'%s'::timestamptz" % str(date.date))
+    else:
+        return AsIs("'%s'::timestamp" % str(date.date))
+
+
+def adapt_range(_range):
+    from psycopg2.extensions import AsIs
+    if _range.start.tz:
+        return AsIs("tstzrange('%s', '%s')" % (str(_range.start.date), str(_range.end.date)))
+    else:
+        return AsIs("tsrange('%s', '%s')" % (str(_range.start.date), str(_range.end.date)))
+
+
+def register():
+    """Registers the adapters with psycopg2, which must be installed"""
+    from psycopg2.extensions import register_adapter
+    register_adapter(Date, adapt_date)
+    register_adapter(Range, adapt_range)
+
+
+class _Loader(object):
+    """Runs `register` right after psycopg2.extensions is executed"""
+    def __init__(self, loader):
+        self.loader = loader
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        register()
+
+
+class _Hook(object):
+    """Meta path finder waiting for psycopg2.extensions to be imported"""
+    def find_spec(self, name, path, target=None):
+        if name != 'psycopg2.extensions':
+            return None
+        uninstall()
+        from importlib.util import find_spec
+        spec = find_spec(name)
+        if spec is not None and spec.loader is not None:
+            spec.loader = _Loader(spec.loader)
+        return spec
+
+
+def uninstall():
+    sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, _Hook)]
+
+
+def install():
+    """Registers the adapters now if psycopg2 is already imported, or once it is"""
+    if 'psycopg2.extensions' in sys.modules:
+        register()
+        return
+    try:
+        import importlib.util
+    except ImportError:
+        # no find_spec protocol, register eagerly when psycopg2 is available
+        try:
+            register()
+        except ImportError:
+            pass
+        return
+    if not any(isinstance(finder, _Hook) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _Hook())
+
+
+# COPY binary format, see https://www.postgresql.org/docs/current/sql-copy.html
+COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+COPY_HEADER = COPY_SIGNATURE + struct.pack('!ii', 0, 0)
+COPY_TRAILER = struct.pack('!h', -1)
+
+# timestamps are int64 microseconds since 2000-01-01, infinity the int64 extremes
+POSTGRES_EPOCH_US = epoch_us(datetime(2000, 1, 1))
+TIMESTAMP_INFINITY = 2 ** 63 - 1
+TIMESTAMP_NEG_INFINITY = -2 ** 63
+
+# range flags, from postgresql's rangetypes.h
+RANGE_EMPTY = 0x01
+RANGE_LB_INC = 0x02
+RANGE_UB_INC = 0x04
+RANGE_LB_INF = 0x08
+RANGE_UB_INF = 0x10
+
+_INT16 = struct.Struct('!h')
+_INT32 = struct.Struct('!i')
+_TIMESTAMP = struct.Struct('!iq')  # field length, then the value
+_NULL = _INT32.pack(-1)
+
+
+def _wall_clock(date):
+    """Returns naive `date` unchanged and aware `date` as naive utc"""
+    tz = date.tzinfo
+    if tz is None:
+        return date
+    date = date.replace(tzinfo=None)
+    # pytz zones attached by `replace` carry their LMT offset, see `epoch_us`
+    return date - (tz.localize(date).utcoffset() if hasattr(tz, 'localize') else tz.utcoffset(date))
+
+
+def text_timestamp(date):
+    """Returns the COPY text of a Date, aware dates are written in utc"""
+    if date.date == 'infinity':
+        return 'infinity'
+    if date.date.tzinfo is None:
+        return date.date.isoformat(' ')
+    return _wall_clock(date.date).isoformat(' ') + '+00'
+
+
+def text_range(_range):
+    """Returns the COPY text of a Range as `[start,end)`, infinite bounds are unbounded"""
+    start, end = _range.start, _range.end
+    return '%s%s,%s%s' % ('(' if start.date == 'infinity' else '["',
+                          '' if start.date == 'infinity' else text_timestamp(start) + '"',
+                          '' if end.date == 'infinity' else '"' + text_timestamp(end),
+                          ')' if end.date == 'infinity' else '")')
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def text_field(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, Range):
+        return text_range(value)
+    if isinstance(value, Date):
+        return text_timestamp(value)
+    if isinstance(value, datetime):
+        return text_timestamp(Date(value))
+    if isinstance(value, bytes) and not isinstance(value, str):
+        value = value.decode('utf-8')
+    return _escape(unicode(value))
+
+
+def _binary_timestamp(date):
+    if date.date == 'infinity':
+        return TIMESTAMP_INFINITY
+    return epoch_us(date.date) - POSTGRES_EPOCH_US
+
+
+def binary_timestamp(date):
+    """Returns the COPY binary field of a Date, length included"""
+    return _TIMESTAMP.pack(8, _binary_timestamp(date))
+
+
+def binary_range(_range):
+    """Returns the COPY binary field of a Range `[start,end)`, length included"""
+    start, end = _range.start, _range.end
+    flags = 0
+    bounds = b''
+    if start.date == 'infinity':
+        flags |= RANGE_LB_INF
+    else:
+        flags |= RANGE_LB_INC
+        bounds += _TIMESTAMP.pack(8, _binary_timestamp(start))
+    if end.date == 'infinity':
+        flags |= RANGE_UB_INF
+    else:
+        bounds += _TIMESTAMP.pack(8, _binary_timestamp(end))
+    return _INT32.pack(1 + len(bounds)) + struct.pack('!B', flags) + bounds
+
+
+def binary_field(value):
+    if value is None:
+        return _NULL
+    if isinstance(value, Range):
+        return binary_range(value)
+    if isinstance(value, Date):
+        return binary_timestamp(value)
+    if isinstance(value, datetime):
+        return binary_timestamp(Date(value))
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    if isinstance(value, bytes):
+        # text columns, or a field already in binary form
+        return _INT32.pack(len(value)) + value
+    raise TypeError("Cannot write %r in COPY binary format, pass it pre-encoded as bytes" % (value, ))
+
+
+def _row(row):
+    return row if isinstance(row, (tuple, list)) else (row, )
+
+
+def copy_rows(rows, format='text'):
+    """Yields the COPY payload of `rows`, one chunk per row plus the binary header and trailer
+
+    A row is a tuple of columns or a single Date or Range. Text chunks are
+    str, binary chunks bytes.
+    """
+    if format == 'text':
+        for row in rows:
+            yield '\t'.join([text_field(value) for value in _row(row)]) + '\n'
+    elif format == 'binary':
+        yield COPY_HEADER
+        for row in rows:
+            row = _row(row)
+            yield _INT16.pack(len(row)) + b''.join([binary_field(value) for value in row])
+        yield COPY_TRAILER
+    else:
+        raise ValueError("Unknown COPY format %r, expected 'text' or 'binary'" % format)
+
+
+def write_copy(rows, output, format='text'):
+    """Writes the COPY payload of `rows` to the file-like `output`"""
+    write = output.write
+    for chunk in copy_rows(rows, format):
+        write(chunk)
+
+
+class CopyStream(object):
+    """Read-only file-like over the COPY payload of `rows`, for `cursor.copy_expert`
+
+    Rows are serialized as they are read, so nothing is held in memory
+    but the current chunk.
+    """
+    def __init__(self, rows, format='text'):
+        self._chunks = copy_rows(rows, format)
+        self._empty = '' if format == 'text' else b''
+        self._buffer = self._empty
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._buffer + self._empty.join(self._chunks)
+            self._buffer = self._empty
+            return data
+        parts, length = [self._buffer], len(self._buffer)
+        while length < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            length += len(chunk)
+        data = self._empty.join(parts)
+        self._buffer = data[size:]
+        return data[:size]
+
+
+# type oids, from postgresql's pg_type.dat
+TIMESTAMP_OID = 1114
+TIMESTAMPTZ_OID = 1184
+TSRANGE_OID = 3908
+TSTZRANGE_OID = 3910
+
+PG_TIMESTAMP = LazyPattern(r"(\d{4})-(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?([+-]\d\d(?::\d\d){0,2})?$")
+# utc offset text => timedelta
+_OFFSETS = {}
+
+
+def decode_timestamp(text):
+    """Returns the datetime of postgresql timestamp or timestamptz output
+
+    >>> decode_timestamp('2014-03-06 15:33:43.764419-05')
+    datetime.datetime(2014, 3, 6, 20, 33, 43, 764419)
+
+    Values with an offset are converted to naive utc, like `Date` does with
+    postgresql output. 'infinity' is returned as is.
+    """
+    if text == 'infinity':
+        return text
+    res = PG_TIMESTAMP.match(text)
+    if res is None:
+        # also -infinity and BC dates, which a Date cannot hold
+        raise TimestringInvalid("Invalid postgresql timestamp %r" % text)
+    year, month, day, hour, minute, second, fraction, offset = res.groups()
+    date = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second),
+                    int(fraction.ljust(6, '0')) if fraction else 0)
+    if offset:
+        delta = _OFFSETS.get(offset)
+        if delta is None:
+            parts = offset[1:].split(':')
+            seconds = int(parts[0]) * 3600 + sum(int(part) * unit for part, unit in zip(parts[1:], (60, 1)))
+            delta = _OFFSETS[offset] = timedelta(seconds=-seconds if offset[0] == '-' else seconds)
+        date = date - delta
+    return date
+
+
+def _date(value):
+    date = Date.__new__(Date)
+    date.date = value
+    return date
+
+
+def _range(start, end):
+    _range = Range.__new__(Range)
+    _range._dates = (start, end)
+    return _range
+
+
+def decode_range(text, bounds=None):
+    """Returns the Range of postgresql tsrange or tstzrange output, None when empty
+
+    >>> decode_range('["2014-03-03 00:00:00","2014-03-10 00:00:00")')
+    <timestring.Range From 03/03/14 00:00:00 to 03/10/14 00:00:00 4483019280>
+
+    Unbounded and infinite bounds are infinite, inclusivity is not kept.
+    '-infinity' is only a lower bound and 'infinity' only an upper one.
+    `bounds` is a dict of already decoded bounds, shared across calls.
+    """
+    if text == 'empty':
+        return None
+    try:
+        lower, upper = text[1:-1].split(',')
+    except ValueError:
+        raise TimestringInvalid("Invalid postgresql range %r" % text)
+    dates = []
+    # the infinity each side may hold, and the one it may not
+    for bound, infinite, inverted in ((lower, '-infinity', 'infinity'), (upper, 'infinity', '-infinity')):
+        bound = bound.strip('"')
+        if bound in ('', infinite):
+            dates.append('infinity')
+            continue
+        if bound == inverted:
+            raise TimestringInvalid("Invalid postgresql range %r, %s cannot bound that side" % (text, bound))
+        date = bounds.get(bound) if bounds is not None else None
+        if date is None:
+            date = decode_timestamp(bound)
+            if bounds is not None:
+                bounds[bound] = date
+        dates.append(date)
+    return _range(_date(dates[0]), _date(dates[1]))
+
+
+def decode_ranges(texts):
+    """Decodes many tsrange or tstzrange strings, each distinct bound once"""
+    bounds = {}
+    return [None if text is None else decode_range(text, bounds) for text in texts]
+
+
+def decode_timestamps(texts):
+    """Decodes many timestamp or timestamptz strings into Dates, each distinct value once"""
+    seen = {}
+    dates = []
+    for text in texts:
+        if text is None:
+            dates.append(None)
+            continue
+        date = seen.get(text)
+        if date is None:
+            date = seen[text] = decode_timestamp(text)
+        dates.append(_date(date))
+    return dates
+
+
+def _cast_timestamp(value, cursor):
+    if value is not None:
+        return _date(decode_timestamp(value))
+
+
+def _cast_range(value, cursor):
+    if value is not None:
+        return decode_range(value)
+
+
+def register_typecasters(scope=None):
+    """Makes psycopg2 return Date and Range for timestamp(tz) and ts(tz)range columns.
+
+    >>> timestring.postgres.register_typecasters(connection)
+
+    Registers globally, or for one connection or cursor `scope`.
+    """
+    from psycopg2.extensions import new_type, register_type
+    types = (new_type((TIMESTAMP_OID, TIMESTAMPTZ_OID), 'TIMESTRING_TIMESTAMP', _cast_timestamp),
+             new_type((TSRANGE_OID, TSTZRANGE_OID), 'TIMESTRING_RANGE', _cast_range))
+    for _type in types:
+        if scope is None:
+            register_type(_type)
+        else:
+            register_type(_type, scope)
+    return types
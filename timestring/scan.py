@@ -0,0 +1,134 @@
+"""Finds the timestrings of many files across processes
+
+>>> for record in timestring.scan_files(glob('archive/*.txt'), workers=8):
+...     print(record.path, record.offset, record.text, record.start, record.end)
+
+Files are memory mapped and cut into segments of about the same number of
+bytes, small files share a segment and large ones are split, so workers get
+even work whatever the file sizes. Each segment is scanned from `overlap`
+bytes before it and reports the matches starting within it, which is the
+same assumption `finditer` makes: no match is longer than `overlap`.
+
+Requires python 3, offsets rely on the surrogateescape error handler
+keeping one character per invalid byte, which python 2 does not have.
+"""
+import os
+import mmap
+from collections import namedtuple
+from datetime import datetime
+from functools import partial
+
+from timestring import timestring_re, _resolve
+from timestring.Range import Range
+
+
+# `offset` is in bytes from the start of the file, `end` is None for dates
+ScanRecord = namedtuple('ScanRecord', ('path', 'offset', 'text', 'start', 'end'))
+
+MIN_SEGMENT = 1 << 16
+MAX_SEGMENT = 1 << 24
+
+
+def plan(paths, workers=1, segment_size=None):
+    """Returns the tasks of a scan, lists of (path, start byte, end byte) of about `segment_size` bytes
+
+    By default each worker gets about four segments to balance the load.
+    """
+    sizes = [(path, os.path.getsize(path)) for path in paths]
+    if segment_size is None:
+        total = sum(size for _, size in sizes)
+        segment_size = max(MIN_SEGMENT, min(MAX_SEGMENT, total // (max(workers, 1) * 4) + 1))
+    tasks, task, filled = [], [], 0
+    for path, size in sizes:
+        pos = 0
+        while pos < size:
+            take = min(size - pos, segment_size - filled)
+            task.append((path, pos, pos + take))
+            pos += take
+            filled += take
+            if filled >= segment_size:
+                tasks.append(task)
+                task, filled = [], 0
+    if task:
+        tasks.append(task)
+    return tasks
+
+
+def _align(data, i):
+    # move off utf-8 continuation bytes, so both segments agree on the boundary
+    while i < len(data) and (data[i] & 0xC0) == 0x80:
+        i += 1
+    return i
+
+
+def _decode(data):
+    # surrogateescape keeps one character per invalid byte, so offsets survive
+    return data.decode('utf-8', 'surrogateescape')
+
+
+def scan_segment(path, start, end, overlap=256, now=None):
+    """Returns the ScanRecords of the matches starting between the bytes `start` and `end` of `path`"""
+    records = []
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            start, end = _align(data, start), _align(data, end)
+            before = _align(data, max(start - overlap, 0))
+            after = _align(data, min(end + overlap * 4, len(data)))
+            head, body, tail = _decode(data[before:start]), _decode(data[start:end]), _decode(data[end:after])
+        finally:
+            data.close()
+
+    text = head + body + tail
+    lo, hi = len(head), len(head) + len(body)
+    char, offset = lo, start
+    for match in timestring_re.PATTERN.finditer(text):
+        found = match.group(1)
+        stripped = found.strip()
+        at = match.start() + len(found) - len(found.lstrip())
+        if at < lo:
+            continue
+        if at >= hi:
+            break
+        offset += len(text[char:at].encode('utf-8', 'surrogateescape'))
+        char = at
+        value = _resolve(found, now)
+        if isinstance(value, Range):
+            records.append(ScanRecord(path, offset, stripped, value.start, value.end))
+        else:
+            records.append(ScanRecord(path, offset, stripped, value, None))
+    return records
+
+
+def _scan_task(task, overlap, now):
+    return [record for path, start, end in task for record in scan_segment(path, start, end, overlap, now)]
+
+
+def _readable(paths):
+    for path in paths:
+        if os.path.getsize(path):
+            yield path
+
+
+def scan_files(paths, workers=1, segment_size=None, overlap=256, now=None):
+    """Yields a ScanRecord for every timestring within the files at `paths`
+
+    With `workers` > 1 segments are scanned in a process pool. Records come
+    back in file then offset order, and all resolve against the same `now`.
+    """
+    tasks = plan(list(_readable(paths)), workers, segment_size)
+    func = partial(_scan_task, overlap=overlap, now=now or datetime.now())
+    if workers > 1 and len(tasks) > 1:
+        from multiprocessing import Pool
+        pool = Pool(min(workers, len(tasks)))
+        try:
+            for records in pool.imap(func, tasks):
+                for record in records:
+                    yield record
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        for task in tasks:
+            for record in func(task):
+                yield record
@@ -1,5 +1,42 @@
 import re
-TIMESTRING_RE = re.compile(re.sub('[\t\n\s]', '', re.sub('(\(\?\#[^\)]+\))', '', r'''
+
+
+class LazyPattern(object):
+    """Compiles a regex the first time it is used
+
+    Behaves like the compiled pattern, so importing timestring does not pay
+    for compiling TIMESTRING_RE until something is parsed.
+    """
+    def __init__(self, source, flags=0, clean=None):
+        self._source = source
+        self._flags = flags
+        self._clean = clean
+        self._compiled = None
+
+    def compile(self):
+        if self._compiled is None:
+            source = self._clean(self._source) if self._clean else self._source
+            self._compiled = re.compile(source, self._flags)
+        return self._compiled
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        value = getattr(self.compile(), name)
+        # later lookups of search, finditer... skip __getattr__
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self):
+        return "<timestring.LazyPattern %s>" % ('compiled' if self._compiled is not None else 'pending')
+
+
+def _clean(source):
+    # drop the (?# comments) then all the whitespace used for layout
+    return re.sub('[\t\n\s]', '', re.sub('(\(\?\#[^\)]+\))', '', source))
+
+
+TIMESTRING_RE = LazyPattern(r'''
     (
         ((?P<prefix>between|from|before|after|\>=?|\<=?|greater\s+th(a|e)n(\s+a)?|less\s+th(a|e)n(\s+a)?)\s+)?
         (
@@ -72,4 +109,41 @@ TIMESTRING_RE = re.compile(re.sub('[\t\n\s]', '', re.sub('(\(\?\#[^\)]+\))', '',
             )+
         )
     )
-    ''')), re.I)
+    ''', re.I, _clean)
+
+
+ENGINES = ('regex', 'tokens')
+
+# The active engine, see `set_engine`, and the pattern parsing goes through.
+ENGINE = 'regex'
+PATTERN = TIMESTRING_RE
+
+
+def set_engine(name):
+    """Chooses what matches the grammar, 'regex' or 'tokens'.
+
+    >>> timestring.set_engine('tokens')
+
+    'regex' is TIMESTRING_RE itself, 'tokens' is `timestring.tokenizer`
+    which finds the same matches in linear time but is slower on ordinary
+    text, worth it for long or untrusted input. Switching drops the parse
+    cache.
+    """
+    global ENGINE, PATTERN
+    if name not in ENGINES:
+        raise ValueError("Unknown engine %r, expected one of %s" % (name, ", ".join(ENGINES)))
+    if name == 'tokens':
+        from timestring.tokenizer import TOKENS
+        PATTERN = TOKENS
+    else:
+        PATTERN = TIMESTRING_RE
+    from timestring import instrument
+    if instrument.RECORDER is not None:
+        PATTERN = instrument.TimedPattern(PATTERN)
+    ENGINE = name
+    from timestring import cache
+    cache.clear_cache()
+
+
+def get_engine():
+    return ENGINE
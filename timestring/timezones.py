@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+from timestring import cache
+
+
+BACKENDS = ('pytz', 'zoneinfo')
+
+# The active backend, see `set_backend`.
+BACKEND = 'pytz'
+
+# tz argument => resolved tzinfo, for the active backend
+_ZONES = {}
+# year => (dst start, dst end) of the US rules used with pytz
+_US_DST = {}
+# (tzinfo, wall clock, is_dst) => utc offset, cleared when full
+OFFSETS_SIZE = 4096
+_OFFSETS = {}
+
+
+def _zoneinfo():
+    try:
+        from zoneinfo import ZoneInfo
+    except ImportError:
+        try:
+            from backports.zoneinfo import ZoneInfo
+        except ImportError:
+            raise ImportError("the zoneinfo backend requires python 3.9+ or `pip install backports.zoneinfo`")
+    return ZoneInfo
+
+
+def set_backend(name):
+    """Chooses the library timezones are resolved with, 'pytz' or 'zoneinfo'.
+
+    >>> timestring.set_backend('zoneinfo')
+
+    zoneinfo looks the utc offset up from each zone's own transitions, pytz
+    uses them too but `today` picks ambiguous offsets by the US DST dates.
+    Switching drops the resolved zones and the parse cache.
+    """
+    global BACKEND
+    if name not in BACKENDS:
+        raise ValueError("Unknown timezone backend %r, expected one of %s" % (name, ", ".join(BACKENDS)))
+    if name == 'zoneinfo':
+        _zoneinfo()
+    BACKEND = name
+    _ZONES.clear()
+    _OFFSETS.clear()
+    cache.clear_cache()
+
+
+def get_backend():
+    return BACKEND
+
+
+def resolve(tz):
+    """Returns the tzinfo of a zone name or tzinfo, resolved once per value
+
+    >>> resolve('US/Eastern')
+    <DstTzInfo 'US/Eastern' LMT-1 day, 19:04:00 STD>
+    """
+    if not tz:
+        return None
+    zone = _ZONES.get(tz)
+    if zone is None:
+        if BACKEND == 'zoneinfo':
+            zone = _zoneinfo()(name(tz))
+        else:
+            import pytz
+            zone = pytz.timezone(name(tz))
+        _ZONES[tz] = zone
+    return zone
+
+
+def name(tz):
+    """Returns the zone name of a tzinfo, ie. 'US/Eastern'"""
+    return getattr(tz, 'zone', None) or getattr(tz, 'key', None) or str(tz)
+
+
+def utc():
+    return resolve('UTC')
+
+
+def us_dst(year):
+    """Returns when US daylight saving time starts and ends in `year`
+
+    Second Sunday in March at 2am until the first Sunday in November at 2am.
+    """
+    bounds = _US_DST.get(year)
+    if bounds is None:
+        # Monday is 0 and Sunday is 6.
+        start = datetime(year, 3, 1, 2, 0, 0) + timedelta(13 - datetime(year, 3, 1).weekday())
+        end = datetime(year, 11, 1, 2, 0, 0) + timedelta(6 - datetime(year, 11, 1).weekday())
+        bounds = _US_DST[year] = (start, end)
+    return bounds
+
+
+def utcoffset(tz, date, now):
+    """Returns the utc offset of `tz` at the wall clock time `date`
+
+    pytz zones pick ambiguous and missing times by whether `now` falls in US
+    daylight saving time, other zones read their own transitions.
+    """
+    if hasattr(tz, 'localize'):
+        start, end = us_dst(now.year)
+        is_dst = start < now < end
+    else:
+        is_dst = None
+    key = (tz, date, is_dst)
+    offset = _OFFSETS.get(key)
+    if offset is None:
+        if is_dst is None:
+            offset = date.replace(tzinfo=tz).utcoffset()
+        else:
+            offset = tz.utcoffset(date, is_dst=is_dst)
+        if len(_OFFSETS) >= OFFSETS_SIZE:
+            _OFFSETS.clear()
+        _OFFSETS[key] = offset
+    return offset
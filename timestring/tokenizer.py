@@ -0,0 +1,392 @@
+"""A linear time engine for the TIMESTRING_RE grammar
+
+>>> timestring.set_engine('tokens')
+
+TIMESTRING_RE nests `((\d+|one|two...)\s*)*` within `(...)+`, so digits
+split into numbers every possible way before the regex gives up, ie.
+"12345678 12345678 12345678" takes seconds, and long runs of numbers or
+spaces are retried from every position. This engine walks the same grammar
+by hand. Words, numbers and times are matched with fixed length patterns,
+runs of digits, spaces and separators are measured once per position and
+the number before a delta is resolved from the right, so each position is
+only visited a bounded number of times.
+
+`TOKENS.search` and `TOKENS.finditer` return what the regex returns: the
+same spans, `group(1)` and `groupdict()`. It bounds the worst case rather
+than speeding up the common one, ordinary prose is slower than through
+the regex.
+"""
+import re
+
+from timestring.timestring_re import LazyPattern
+
+
+# named groups of TIMESTRING_RE, in order
+GROUPS = ('prefix', 'unixtime', 'ref', 'main', 'num', 'delta', 'delta_2', 'ago', 'day_2',
+          'year_6', 'month', 'date', 'year', 'year_3', 'month_3', 'date_3', 'month_2', 'date_2', 'year_2',
+          'month_4', 'year_4', 'year_5', 'hour', 'minute', 'am', 'hour_2', 'minute_2', 'seconds',
+          'hour_3', 'am_1', 'daytime', 'month_1')
+
+MONTHS = (r'january|february|march|april|june|july|august|september|october|november|december'
+          r'|jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec')
+
+# Where a match may begin, every other position fails right away. Runs of
+# separators only need their first position, the rest can not differ.
+START = LazyPattern(r"""\d|'|[<>]|(?<![\/\-\s])[\/\-\s]|(?<![a-zA-Z])[yqdhms](?!\w)
+    |between|from|before|after|greater|less|next|last|prev|this
+    |couple|one|two|twe|thr|thi|four|five|fif|six|seven|eight|nine|ten|eleven|hundred
+    |second|minute|hour|day|week|month|quarter|year
+    |yesterday|today|now|tomorrow|mon|tue|wed|thu|fri|sat|sun
+    |jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec
+    |noon|morning|around|about|near|by|evening|mid|night""", re.I | re.X)
+
+WS = LazyPattern(r'\s*')
+SEP = LazyPattern(r'[\/\-\s]*')
+DIGITS = LazyPattern(r'\d*')
+
+PREFIX = LazyPattern(r'between|from|before|after|\>=?|\<=?', re.I)
+COMPARE = LazyPattern(r'greater|less', re.I)
+THAN = LazyPattern(r'th(a|e)n', re.I)
+A = LazyPattern(r'a', re.I)
+UNIXTIME = LazyPattern(r'\d{10}')
+REF = LazyPattern(r'next|last|prev(?P<ious>ious)?|this', re.I)
+CONJ = LazyPattern(r'on|at|of|by|and|to|@', re.I)
+
+# the numbers of `num`, as in TIMESTRING_RE
+NUMBER = LazyPattern(r'couple(\s+of)?|one|two|twenty|twelve|three|thirty|thirteen|four(teen|ty)?|five|fif(teen|ty)'
+                     r'|six(teen|ty)?|seven(teen|ty)?|eight(een|y)?|nine(teen|ty)?|ten|eleven|hundred', re.I)
+# groups of the optional suffixes, "four" is a number as well as "fourteen"
+SUFFIXES = (1, 2, 4, 5, 6, 7)
+DELTA = LazyPattern(r'(?P<delta>seconds?|minutes?|hours?|days?|weeks?|months?|quarters?|years?)'
+                    r'|((?<![a-zA-Z])(?P<delta_2>[YyQqDdHhMmSs])(?!\w))', re.I)
+AGO = LazyPattern(r'ago', re.I)
+
+DAY = LazyPattern(r'(?P<day_2>yesterday|today|now|tomorrow|mondays?|tuesdays?|wednesdays?|thursdays?|fridays?'
+                  r'|saturdays?|sundays?|mon|tues?|wedn?|thur?|fri|sat|sun)', re.I)
+YEAR_6 = LazyPattern(r"(?P<year_6>(([12][089]\d{2})|('\d{2})))", re.I)
+MONTH_DATE = LazyPattern(r"(?P<month>" + MONTHS + r")[\/\-\s]((?P<date>(\d{1,2})(?!\d))(th|nd|st|rd)?)"
+                         r"(,?\s(?P<year>([12][089]|')?\d{2}))?", re.I)
+NUMERIC = LazyPattern(r"""
+    ((?P<year_3>[12][089]\d{2})[/-](?P<month_3>[01]?\d)([/-](?P<date_3>[0-3]?\d))?)T?
+    |((?P<month_2>[01]?\d)[/-](?P<date_2>[0-3]?\d)[/-](?P<year_2>(([12][089]\d{2})|(\d{2}))))
+    |((?P<month_4>[01]?\d)[/-](?P<year_4>([12][089]\d{2})|(\d{2})))
+    |(?P<year_5>([12][089]\d{2})|('\d{2}))""", re.I | re.X)
+CLOCK = LazyPattern(r'(?P<hour>[012]?[0-9]):(?P<minute>[0-5]\d)')
+AM = LazyPattern(r'(?P<am>am|pm|p|a)', re.I)
+CLOCK_2 = LazyPattern(r'(?P<hour_2>[012]?[0-9]):(?P<minute_2>[0-5]\d)(:(?P<seconds>[0-5]\d))?')
+HOUR = LazyPattern(r'(?P<hour_3>[012]?[0-9])')
+AM_1 = LazyPattern(r"(?P<am_1>am|pm|p|a|o'?clock)", re.I)
+DAYTIME = LazyPattern(r'(after)?noon|morning', re.I)
+AROUND = LazyPattern(r'around|about|near|by', re.I)
+THIS = LazyPattern(r'this', re.I)
+TIME = LazyPattern(r'time', re.I)
+DAYTIME_2 = LazyPattern(r'evening|(mid)?night(time)?', re.I)
+MONTH_1 = LazyPattern(r'(?P<month_1>' + MONTHS + r')', re.I)
+
+
+def _found(match):
+    return dict((k, v) for k, v in match.groupdict().items() if v is not None and k in GROUPS)
+
+
+class TokenMatch(object):
+    """What TIMESTRING_RE's match object offers `timestring`"""
+    def __init__(self, string, start, end, groups):
+        self.string = string
+        self._start = start
+        self._end = end
+        self._groups = groups
+
+    def start(self, group=0):
+        return self._start
+
+    def end(self, group=0):
+        return self._end
+
+    def span(self, group=0):
+        return (self._start, self._end)
+
+    def group(self, *names):
+        values = [self.string[self._start:self._end] if name in (0, 1) else self._groups.get(name)
+                  for name in names or (0, )]
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def groupdict(self, default=None):
+        return dict((name, self._groups.get(name, default)) for name in GROUPS)
+
+    def __repr__(self):
+        return "<timestring.TokenMatch span=%r match=%r>" % (self.span(), self.group())
+
+
+class _Text(object):
+    """One string being searched, with the runs and numbers measured so far"""
+    def __init__(self, text):
+        self.text = text
+        self._runs = {WS: {}, SEP: {}, DIGITS: {}}
+        self._numbers = {}
+
+    def run(self, pattern, i):
+        """End of the run of `pattern` characters at `i`, each run is measured once"""
+        ends = self._runs[pattern]
+        end = ends.get(i)
+        if end is None:
+            end = pattern.match(self.text, i).end()
+            for j in range(i, end + 1):
+                ends[j] = end
+        return end
+
+    def _landings(self, i):
+        """Where the number at `i` ends, spaces after it included"""
+        text = self.text
+        if i >= len(text):
+            return ()
+        digits = self.run(DIGITS, i)
+        if digits > i:
+            return (self.run(WS, digits), )
+        match = NUMBER.match(text, i)
+        if match is None:
+            return ()
+        ends = [match.end()]
+        for group in SUFFIXES:
+            if match.start(group) >= 0:
+                ends.append(match.start(group))
+        return [self.run(WS, end) for end in ends]
+
+    def number(self, i):
+        """Where the delta after `(?P<num>((\d+|one|two...)\s*)*)` at `i` starts
+
+        The regex tries the delta after the longest number first, which is
+        also the last position it can reach, so this is the furthest reachable
+        position a delta follows, or None.
+        """
+        numbers = self._numbers
+        stack = [i]
+        while stack:
+            x = stack[-1]
+            if x in numbers:
+                stack.pop()
+                continue
+            landings = self._landings(x)
+            pending = [y for y in landings if y not in numbers]
+            if pending:
+                stack.extend(pending)
+                continue
+            best = x if DELTA.match(self.text, x) else None
+            for y in landings:
+                if numbers[y] is not None and (best is None or numbers[y] > best):
+                    best = numbers[y]
+            numbers[x] = best
+            stack.pop()
+        return numbers[i]
+
+    def attempt(self, p):
+        """Matches the whole grammar at `p`, returns (end, groups) or None"""
+        text = self.text
+        for end in self._prefixes(p):
+            start = self.run(WS, end)
+            if start > end:
+                found = self._rest(start)
+                if found:
+                    found[1]['prefix'] = text[p:end]
+                    return found
+        return self._rest(p)
+
+    def _prefixes(self, p):
+        text = self.text
+        match = PREFIX.match(text, p)
+        if match:
+            return (match.end(), )
+        match = COMPARE.match(text, p)
+        if match is None:
+            return ()
+        start = self.run(WS, match.end())
+        match = THAN.match(text, start) if start > match.end() else None
+        if match is None:
+            return ()
+        start = self.run(WS, match.end())
+        if start > match.end() and A.match(text, start):
+            return (start + 1, match.end())
+        return (match.end(), )
+
+    def _rest(self, p):
+        match = UNIXTIME.match(self.text, p)
+        if match:
+            return match.end(), {'unixtime': match.group()}
+        groups = {}
+        end = p
+        while True:
+            found = self._iteration(end)
+            if found is None:
+                break
+            end, more = found
+            groups.update(more)
+        if end == p:
+            return None
+        return end, groups
+
+    def _iteration(self, q):
+        text = self.text
+        match = REF.match(text, q)
+        if match:
+            ends = (match.end(), match.start('ious')) if match.group('ious') else (match.end(), )
+            for end in ends:
+                start = self.run(WS, end)
+                if start > end:
+                    found = self._main(start)
+                    if found:
+                        found[1]['ref'] = text[q:end]
+                        return self._conj(found[0]), found[1]
+        found = self._main(q)
+        if found:
+            return self._conj(found[0]), found[1]
+        return None
+
+    def _conj(self, i):
+        text = self.text
+        if text.startswith(',', i):
+            i += 1
+        start = self.run(WS, i)
+        if start > i:
+            match = CONJ.match(text, start)
+            if match:
+                i = match.end()
+        return self.run(WS, i)
+
+    def _main(self, q):
+        for alternative in (self._relative, self._day, self._month_date, self._numeric, self._clock, self._month):
+            found = alternative(q)
+            if found:
+                found[1]['main'] = self.text[q:found[0]]
+                return found
+        return None
+
+    def _relative(self, q):
+        text = self.text
+        start = self.number(q)
+        if start is None:
+            return None
+        match = DELTA.match(text, start)
+        groups = _found(match)
+        groups['num'] = text[q:start]
+        end = match.end()
+        ws = self.run(WS, end)
+        if ws > end:
+            ago = AGO.match(text, ws)
+            if ago:
+                groups['ago'] = ago.group()
+                end = ago.end()
+        return end, groups
+
+    def _day(self, q):
+        match = DAY.match(self.text, q)
+        return match and (match.end(), _found(match))
+
+    def _month_date(self, q):
+        text = self.text
+        year = YEAR_6.match(text, q)
+        if year:
+            match = MONTH_DATE.match(text, self.run(SEP, year.end()))
+            if match:
+                groups = _found(match)
+                groups['year_6'] = year.group('year_6')
+                return match.end(), groups
+        match = MONTH_DATE.match(text, self.run(SEP, q))
+        return match and (match.end(), _found(match))
+
+    def _numeric(self, q):
+        match = NUMERIC.match(self.text, q)
+        return match and (match.end(), _found(match))
+
+    def _clock(self, q):
+        text = self.text
+        match = CLOCK.match(text, q)
+        if match:
+            am = AM.match(text, self.run(WS, match.end()))
+            if am:
+                groups = _found(match)
+                groups['am'] = am.group('am')
+                return am.end(), groups
+        match = CLOCK_2.match(text, q)
+        if match:
+            return match.end(), _found(match)
+        match = HOUR.match(text, q)
+        if match:
+            am = AM_1.match(text, self.run(WS, match.end()))
+            if am:
+                groups = _found(match)
+                groups['am_1'] = am.group('am_1')
+                return am.end(), groups
+        end = self._daytime(q)
+        if end:
+            return end, {'daytime': text[q:end]}
+        return None
+
+    def _daytime(self, q):
+        """`(after)?noon|morning|((around|about|near|by)\s+)?this\s+time|evening|(mid)?night(time)?`"""
+        text = self.text
+        match = DAYTIME.match(text, q)
+        if match:
+            return match.end()
+        around = AROUND.match(text, q)
+        if around:
+            end = self._this_time(around.end(), True)
+            if end:
+                return end
+        end = self._this_time(q, False)
+        if end:
+            return end
+        match = DAYTIME_2.match(text, q)
+        return match and match.end()
+
+    def _this_time(self, i, space):
+        text = self.text
+        start = self.run(WS, i) if space else i
+        if start == i and space:
+            return None
+        this = THIS.match(text, start)
+        if this is None:
+            return None
+        start = self.run(WS, this.end())
+        match = TIME.match(text, start) if start > this.end() else None
+        return match and match.end()
+
+    def _month(self, q):
+        match = MONTH_1.match(self.text, q)
+        return match and (match.end(), _found(match))
+
+
+class TokenPattern(object):
+    """Stands in for TIMESTRING_RE, see the module docstring"""
+    def search(self, string, pos=0):
+        return self._search(_Text(string), pos)
+
+    def _search(self, text, pos):
+        string = text.text
+        p = pos
+        while p <= len(string):
+            found = text.attempt(p)
+            if found:
+                end, groups = found
+                return TokenMatch(string, p, end, groups)
+            match = START.search(string, p + 1)
+            if match is None:
+                return None
+            p = match.start()
+        return None
+
+    def finditer(self, string, pos=0):
+        text = _Text(string)
+        while True:
+            match = self._search(text, pos)
+            if match is None:
+                return
+            yield match
+            pos = match.end()
+
+    def findall(self, string, pos=0):
+        return [match.group(1) for match in self.finditer(string, pos)]
+
+    def __repr__(self):
+        return "<timestring.TokenPattern>"
+
+
+TOKENS = TokenPattern()
@@ -0,0 +1,127 @@
+from datetime import datetime
+
+from timestring.Date import Date, epoch_us
+from timestring.Range import Range
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+
+# int64 stand-ins for postgresql's infinity. NaT is -2**63 so it is never used.
+INFINITY_US = 2 ** 63 - 1
+NEG_INFINITY_US = -(2 ** 63 - 1)
+NAT_US = -2 ** 63
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("timestring vectorized parsing requires numpy, `pip install numpy`")
+    return numpy
+
+
+def _missing(value):
+    # None and pandas/numpy NaN markers (NaN != NaN)
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _factorize(values):
+    """Returns the unique values in order of appearance and each value's index into them"""
+    seen = {}
+    uniques = []
+    codes = []
+    for value in values:
+        code = seen.get(value)
+        if code is None:
+            code = seen[value] = len(uniques)
+            uniques.append(value)
+        codes.append(code)
+    return uniques, codes
+
+
+def _resolve_many(values, resolve, width, kinds=(str, unicode)):
+    """Resolves each distinct value of one of `kinds`, anything else is invalid"""
+    numpy = _numpy()
+    if hasattr(values, 'tolist'):
+        # numpy arrays and pandas columns
+        values = values.tolist()
+    uniques, codes = _factorize(values)
+
+    resolved = numpy.full((len(uniques), width), NAT_US, dtype='int64')
+    ok = numpy.zeros(len(uniques), dtype=bool)
+    for index, value in enumerate(uniques):
+        # Date would read other numbers as today, unless they look like a unixtime
+        if _missing(value) or not isinstance(value, kinds):
+            continue
+        try:
+            resolved[index] = resolve(value)
+        except Exception:
+            continue
+        ok[index] = True
+
+    codes = numpy.asarray(codes, dtype='intp')
+    return [resolved[codes, column].view('datetime64[us]') for column in range(width)], ok[codes]
+
+
+def _bound(date, infinity):
+    if date.date == 'infinity':
+        return infinity
+    return epoch_us(date.date)
+
+
+def parse_many(strings, tz=None, now=None):
+    """Parses many timestrings into a NumPy `datetime64[us]` array.
+
+    >>> values, valid = timestring.parse_many(["2013-09-10", "yesterday", "nope"])
+    >>> valid
+    array([ True,  True, False])
+
+    Each distinct value is resolved once. Invalid and missing values are NaT
+    with a False in the validity mask, infinity is the largest datetime64[us].
+    datetimes and datetime64 values are taken as they are, other values that
+    are not strings, numbers included, are invalid.
+    Aware results are converted to UTC. Every value resolves against the
+    same `now`, read once when not provided.
+    """
+    numpy = _numpy()
+    if getattr(getattr(strings, 'dtype', None), 'kind', None) == 'M':
+        # already timestamps, tolist() would turn datetime64[ns] into integers
+        values = numpy.asarray(strings)
+        if values.dtype.kind == 'M':
+            values = values.astype('datetime64[us]')
+            return values, ~numpy.isnat(values)
+        # zone aware pandas columns come out as Timestamps, resolved one by one
+        strings = values
+    now = now or datetime.now()
+
+    def resolve(value):
+        if isinstance(value, numpy.datetime64):
+            if numpy.isnat(value):
+                raise ValueError("NaT")
+            return value.astype('datetime64[us]').astype('int64')
+        return _bound(Date(value, tz=tz, now=now), INFINITY_US)
+
+    (values, ), valid = _resolve_many(strings, resolve, 1, (str, unicode, datetime, Date, numpy.datetime64))
+    return values, valid
+
+
+def parse_range_many(strings, tz=None, now=None):
+    """Parses many timestrings as `Range` bounds.
+
+    >>> starts, ends, valid = timestring.parse_range_many(["this month", "last 7 days"])
+
+    Returns `datetime64[us]` start and end arrays plus a validity mask,
+    values that are not strings are invalid.
+    Infinite starts and ends are the smallest and largest datetime64[us].
+    """
+    now = now or datetime.now()
+
+    def resolve(value):
+        _range = Range(value, tz=tz, now=now)
+        return _bound(_range.start, NEG_INFINITY_US), _bound(_range.end, INFINITY_US)
+
+    (starts, ends), valid = _resolve_many(strings, resolve, 2)
+    return starts, ends, valid